@@ -0,0 +1,116 @@
+import random
+
+from common import load_json_file
+from exceptions import InvalidTrainerSpecException, InvalidPokemonLevelException
+from pokemonfactory import RandomizedPokemonFactory, assert_valid_pokemon_level, TEAM_SIZE
+from trainer import Trainer
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+YAML_EXTENSIONS = (".yaml", ".yml")
+TRAINER_PROPERTIES = ["winCommand", "lossCommand", "canOnlyBeatOnce", "cooldownSeconds", "partyMaximumLevel",
+                      "defeatRequiredTrainers"]
+
+
+def load_trainer_spec(filepath):
+    '''
+    A spec lists trainers to generate, keys missing from a trainer are taken from "defaults"
+    {
+      "defaults": {"teamSize": 6, "level": {"min": 20, "max": 30}},
+      "trainers": [
+        {"name": "brock", "team": ["geodude", "onix"], "level": 14, "partyMaximumLevel": 14},
+        {"name": "route1", "teamSize": 3, "level": {"min": 3, "max": 5}, "winCommand": "give {player} potion"}
+      ]
+    }
+    '''
+    try:
+        spec = _load_yaml_file(filepath) if filepath.endswith(YAML_EXTENSIONS) else load_json_file(filepath)
+    except (OSError, ValueError) as e:
+        raise InvalidTrainerSpecException("Failed to read {filepath}: {error}".format(filepath=filepath, error=e))
+
+    if not isinstance(spec, dict) or not isinstance(spec.get("trainers"), list):
+        raise InvalidTrainerSpecException("{filepath} has no list of trainers".format(filepath=filepath))
+
+    defaults = spec.get("defaults", {})
+    return [{**defaults, **t} for t in spec["trainers"]]
+
+
+def _load_yaml_file(filepath):
+    if yaml is None:
+        raise InvalidTrainerSpecException("PyYAML is required to read {filepath}".format(filepath=filepath))
+
+    try:
+        with open(filepath, "r") as file:
+            return yaml.safe_load(file)
+    except yaml.YAMLError as e:
+        raise InvalidTrainerSpecException("Failed to read {filepath}: {error}".format(filepath=filepath, error=e))
+
+
+class BatchTrainerGenerator:
+    '''
+    Generates a trainer from its spec, see load_trainer_spec, TrainerGenerationEngine runs it over a whole spec
+    '''
+
+    def __init__(self, api):
+        self._api = api
+
+    def generate(self, trainer_spec, rng=random):
+        trainer = Trainer(self._get_trainer_name(trainer_spec))
+        for key in TRAINER_PROPERTIES:
+            if key in trainer_spec:
+                trainer.properties[key] = trainer_spec[key]
+
+        names = self.get_team_names(trainer_spec, rng)
+        levels = None
+        if "level" in trainer_spec:
+            levels = [self._get_random_level(trainer_spec["level"], rng) for _ in names]
+        trainer.properties["team"] = RandomizedPokemonFactory(self._api, rng).create_team(names, levels)
+
+        return trainer
+
+    def _get_trainer_name(self, trainer_spec):
+        name = trainer_spec.get("name", "")
+        if not isinstance(name, str) or name == "":
+            raise InvalidTrainerSpecException("Trainer's name cannot be empty")
+        return name
+
+    def get_team_names(self, trainer_spec, rng=random):
+        if "team" in trainer_spec:
+            if len(trainer_spec["team"]) > TEAM_SIZE:
+                raise InvalidTrainerSpecException("team has {count} Pokemons, at most {size} fit".format(
+                    count=len(trainer_spec["team"]), size=TEAM_SIZE))
+            return [str(n).lower() for n in trainer_spec["team"]]
+
+        team_size = trainer_spec.get("teamSize", TEAM_SIZE)
+        if not isinstance(team_size, int) or not 1 <= team_size <= TEAM_SIZE:
+            raise InvalidTrainerSpecException("teamSize must be between 1 and {}".format(TEAM_SIZE))
+        return [self._api.get_random_pokemon_name(rng) for _ in range(team_size)]
+
+    def get_maximum_level(self, trainer_spec):
+        '''
+        :return: highest level a Pokemon of trainer_spec can be generated at
+        '''
+        if "level" not in trainer_spec:
+            return RandomizedPokemonFactory(self._api).get_default_level()
+        return self._get_level_range(trainer_spec["level"])[1]
+
+    def _get_random_level(self, level, rng):
+        minimum, maximum = self._get_level_range(level)
+        try:
+            assert_valid_pokemon_level(minimum)
+            assert_valid_pokemon_level(maximum)
+            return rng.randint(minimum, maximum)
+        except (InvalidPokemonLevelException, ValueError):
+            raise InvalidTrainerSpecException("Invalid level range {}-{}".format(minimum, maximum))
+
+    def _get_level_range(self, level):
+        if isinstance(level, int):
+            return level, level
+        try:
+            return int(level["min"]), int(level["max"])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidTrainerSpecException("Invalid level {}".format(level))
+
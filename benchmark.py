@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from common import create_double_logger, TokenBucket
+from exceptions import ApiRequestFailedException, PokemonCreationFailedException
+from pokeapistandin import PokeApiStandIn
+from pokemonfactory import RandomizedPokemonFactory
+from pokemonwikiapi import PokeApi, Sqlite3, NormalizedSqlite3, ConnectionManager, extract_pokemon_document
+
+FIXTURE_DIRPATH = os.path.join("test", "fixtures", "pokeapi")
+TEAM_SIZE = 6
+MAX_ATTEMPTS = 20
+# Unthrottled unless asked for, otherwise cold runs only measure the rate limiter
+UNLIMITED_REQUESTS_PER_SECOND = 1000000
+STARTUP_BUDGET_MS = 250
+# Mew learns nearly every machine move, in every version group it appears in
+LARGE_DOCUMENT_MOVES = 380
+LARGE_DOCUMENT_VERSION_GROUPS = 10
+PARSERS = {"json": json.loads, "extract": extract_pokemon_document}
+# None of these are needed to show the first menu
+DEFERRED_MODULES = ["requests", "sqlite3", "pokemonwikiapi", "cProfile"]
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import main
+milliseconds = (time.perf_counter() - start) * 1000
+print(json.dumps({"importMs": milliseconds, "loaded": [m for m in sys.argv[1:] if m in sys.modules]}))
+"""
+
+
+class Benchmark:
+    '''
+    Measures PokeApi and RandomizedPokemonFactory against a PokeApiStandIn, every round starts from an empty cache
+    Cold timings include fetching from the stand-in, warm ones read from the cache the cold ones filled
+    '''
+
+    def __init__(self, stand_in, rounds=3, requests_per_second=UNLIMITED_REQUESTS_PER_SECOND, seed=0):
+        self._logger = create_double_logger(__name__)
+        self._stand_in = stand_in
+        self._rounds = rounds
+        self._requests_per_second = requests_per_second
+        self._random = random.Random(seed)
+        self._timings = {}
+        self._failures = {}
+        self._database_sizes = []
+
+    def run(self):
+        with tempfile.TemporaryDirectory() as dirpath:
+            for i in range(self._rounds):
+                round_dirpath = os.path.join(dirpath, "round{}".format(i))
+                os.makedirs(round_dirpath)
+                self._run_round(round_dirpath)
+
+        return {
+            "timings": {k: summarize_timings(v) for k, v in self._timings.items()},
+            "failures": self._failures,
+            "databaseBytes": max(self._database_sizes),
+            "requests": self._stand_in.request_count,
+            "injectedErrors": self._stand_in.error_count,
+        }
+
+    def _run_round(self, dirpath):
+        team_filepath = os.path.join(dirpath, "team.db")
+        team_api = self._create_api(team_filepath)
+        PokeApi._memo.clear()
+        names = self._get_eligible_names(team_api)
+        teams = [[self._random.choice(names) for _ in range(TEAM_SIZE)] for _ in range(len(names))]
+        self._measure("teamCold", RandomizedPokemonFactory(team_api, self._random).create_team, teams[0])
+        ConnectionManager.get(team_filepath).close()
+
+        filepath = os.path.join(dirpath, "pokemon.db")
+        api = self._create_api(filepath)
+        PokeApi._memo.clear()
+        self._measure("randomNameCold", api.get_random_pokemon_name, self._random)
+
+        factory = RandomizedPokemonFactory(api, self._random)
+        for name in names:
+            self._measure("createCold", factory.create, name)
+        # Warm movesets below are scored for coverage once the moves are cached
+        self._measure("movesCold", api.prefetch_moves)
+
+        ConnectionManager.get(filepath).flush()
+        self._database_sizes.append(get_database_size(filepath))
+
+        for name in names:
+            PokeApi._memo.clear()
+            self._measure("createWarm", factory.create, name)
+        for team in teams:
+            PokeApi._memo.clear()
+            self._measure("teamWarm", factory.create_team, team)
+        for _ in names:
+            self._measure("randomNameWarm", api.get_random_pokemon_name, self._random)
+
+        ConnectionManager.get(filepath).close()
+
+    def _get_eligible_names(self, api):
+        # Retried, every other measurement depends on it even when errors are injected
+        for _ in range(MAX_ATTEMPTS - 1):
+            try:
+                return api.get_eligible_pokemon_names()
+            except ApiRequestFailedException as e:
+                self._logger.debug(e.message)
+        return api.get_eligible_pokemon_names()
+
+    def _create_api(self, filepath):
+        rate_limiter = TokenBucket(self._requests_per_second, self._requests_per_second)
+        return PokeApi(self._stand_in.base_url, Sqlite3("pokeapi", filepath), NormalizedSqlite3(filepath),
+                       rate_limiter)
+
+    def _measure(self, key, function, *args):
+        start = time.perf_counter()
+        try:
+            function(*args)
+        except (ApiRequestFailedException, PokemonCreationFailedException) as e:
+            self._failures[key] = self._failures.get(key, 0) + 1
+            self._logger.debug("{key} failed: {reason}".format(key=key, reason=e.message))
+            return
+        self._timings.setdefault(key, []).append(time.perf_counter() - start)
+
+
+def measure_startup(rounds, budget_ms=STARTUP_BUDGET_MS):
+    '''
+    Imports main in a fresh interpreter every round, interpreter startup itself is not counted
+    '''
+    dirpath = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(rounds):
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, *DEFERRED_MODULES], cwd=dirpath,
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output))
+
+    import_timing = summarize_timings([r["importMs"] / 1000 for r in runs])
+    return {
+        "import": import_timing,
+        "budgetMs": budget_ms,
+        "withinBudget": import_timing["medianMs"] <= budget_ms,
+        "loadedDeferredModules": sorted(set(m for r in runs for m in r["loaded"])),
+    }
+
+
+def create_large_pokemon_document(move_count=LARGE_DOCUMENT_MOVES, version_group_count=LARGE_DOCUMENT_VERSION_GROUPS):
+    '''
+    :return: text of a pokemon document shaped like PokeAPI's, with every move learned in every version group
+    '''
+    base_url = "https://pokeapi.co/api/v2/"
+    document = {
+        "id": 151,
+        "name": "mew",
+        "abilities": [{"ability": {"name": "synchronize", "url": base_url + "ability/28/"}, "is_hidden": False,
+                       "slot": 1}],
+        "moves": [{"move": {"name": "move-{}".format(i), "url": base_url + "move/{}/".format(i)},
+                   "version_group_details": create_version_group_details(i, version_group_count, base_url)}
+                  for i in range(1, move_count + 1)],
+        "sprites": {"front_default": base_url + "sprites/151.png"},
+        "types": [{"slot": 1, "type": {"name": "psychic", "url": base_url + "type/14/"}}],
+    }
+    return json.dumps(document)
+
+
+def create_version_group_details(move_index, version_group_count, base_url):
+    '''
+    Every move gets details of its own, a few learned by leveling up, like the documents PokeAPI serves
+    '''
+    level_up = move_index % 4 == 0
+    return [{
+        "level_learned_at": (move_index + i) % 100 if level_up else 0,
+        "move_learn_method": {"name": "level-up", "url": base_url + "move-learn-method/1/"} if level_up else
+        {"name": "machine", "url": base_url + "move-learn-method/4/"},
+        "version_group": {"name": "version-group-{}".format(i), "url": base_url + "version-group/{}/".format(i)},
+    } for i in range(1, version_group_count + 1)]
+
+
+def measure_parsing(rounds, text=None):
+    '''
+    Times json.loads and extract_pokemon_document on the same pokemon document and the memory each one peaks at
+    '''
+    if text is None:
+        text = create_large_pokemon_document()
+
+    results = {"documentBytes": len(text.encode("utf-8"))}
+    for key, parse in PARSERS.items():
+        seconds = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            parse(text)
+            seconds.append(time.perf_counter() - start)
+        results[key] = {**summarize_timings(seconds), "peakBytes": measure_peak_memory(parse, text)}
+    return results
+
+
+def measure_peak_memory(function, *args):
+    '''
+    :return: most bytes allocated at once while function ran and while its result was still held
+    '''
+    tracemalloc.start()
+    try:
+        result = function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def summarize_timings(seconds):
+    milliseconds = sorted(s * 1000 for s in seconds)
+    return {
+        "count": len(milliseconds),
+        "meanMs": statistics.fmean(milliseconds),
+        "medianMs": statistics.median(milliseconds),
+        "p95Ms": milliseconds[min(len(milliseconds) - 1, int(len(milliseconds) * 0.95))],
+        "minMs": milliseconds[0],
+        "maxMs": milliseconds[-1],
+    }
+
+
+def get_database_size(filepath):
+    return sum(os.path.getsize(filepath + suffix) for suffix in ["", "-wal"] if os.path.exists(filepath + suffix))
+
+
+def compare_results(results, baseline):
+    '''
+    :return: {timing: current median / baseline median}, above 1 is slower than the baseline
+    '''
+    timings = {**results["timings"], "startup": results["startup"]["import"]}
+    baseline_timings = {**baseline.get("timings", {}), "startup": baseline.get("startup", {}).get("import")}
+    for key in PARSERS:
+        timings["parse" + key.capitalize()] = results["parsing"][key]
+        baseline_timings["parse" + key.capitalize()] = baseline.get("parsing", {}).get(key)
+
+    ratios = {}
+    for key, timing in timings.items():
+        previous = baseline_timings.get(key)
+        if previous is not None and previous["medianMs"] > 0:
+            ratios[key] = timing["medianMs"] / previous["medianMs"]
+    return ratios
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(description="Benchmark Pokemon creation against a local PokeAPI stand-in")
+    parser.add_argument("--fixtures", default=FIXTURE_DIRPATH, help="Fixture directory laid out like PokeAPI api-data")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds to run, each from an empty cache")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stand-in delays every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stand-in responses failing")
+    parser.add_argument("--requests-per-second", type=float, default=UNLIMITED_REQUESTS_PER_SECOND)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--startup-rounds", type=int, default=10, help="Fresh interpreters to time importing main in")
+    parser.add_argument("--startup-budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                        help="Exit with 1 when the median import of main takes longer")
+    parser.add_argument("--parse-rounds", type=int, default=20, help="Times to parse a large pokemon document")
+    parser.add_argument("--output", help="File to write results to, printed otherwise")
+    parser.add_argument("--baseline", help="Results of a previous run to compare medians with")
+    return parser
+
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+
+    with PokeApiStandIn(args.fixtures, args.latency, args.error_rate, args.seed) as stand_in:
+        results = Benchmark(stand_in, args.rounds, args.requests_per_second, args.seed).run()
+
+    startup = measure_startup(args.startup_rounds, args.startup_budget_ms)
+    parsing = measure_parsing(args.parse_rounds)
+
+    results = {
+        "createdAt": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "fixtures": args.fixtures,
+            "rounds": args.rounds,
+            "latency": args.latency,
+            "errorRate": args.error_rate,
+            "requestsPerSecond": args.requests_per_second,
+            "seed": args.seed,
+        },
+        "startup": startup,
+        "parsing": parsing,
+        **results,
+    }
+    if args.baseline is not None:
+        with open(args.baseline, "r") as file:
+            results["baselineRatios"] = compare_results(results, json.load(file))
+
+    text = json.dumps(results, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    return 0 if startup["withinBudget"] and not startup["loadedDeferredModules"] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
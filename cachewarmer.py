@@ -0,0 +1,93 @@
+import threading
+
+from common import create_double_logger
+
+
+class CacheWarmer:
+    '''
+    Prefetches species and their default pokemon in batches, then the moves they learn, within the shared rate limit
+    Documents already in the cache are skipped, so a warm-up that was stopped or interrupted resumes where it left off
+    '''
+    BATCH_SIZE = 10
+
+    def __init__(self, api):
+        self._logger = create_double_logger(__name__)
+        self._api = api
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.total = 0
+        self.cached = 0
+        self.failed = 0
+        self.moves_total = 0
+        self.moves_cached = 0
+
+    def run(self, names, progress=None):
+        '''
+        :param progress: called with the warmer after every batch
+        :return: number of names cached
+        '''
+        names = list(dict.fromkeys(names))
+        missing = [n for n in names if not self._api.is_pokemon_cached(n)]
+        self.total = len(names)
+        self.cached = len(names) - len(missing)
+        self.failed = 0
+        self._logger.debug("Warming {missing} of {total} species".format(missing=len(missing), total=self.total))
+
+        for start in range(0, len(missing), self.BATCH_SIZE):
+            if self._stop_event.is_set():
+                break
+            self._warm_batch(missing[start:start + self.BATCH_SIZE])
+            if progress is not None:
+                progress(self)
+
+        self._warm_moves(progress)
+        return self.cached
+
+    def _warm_batch(self, names):
+        self._api.prefetch(names)
+        cached = sum(1 for n in names if self._api.is_pokemon_cached(n))
+        self.cached += cached
+        self.failed += len(names) - cached
+        self._logger.debug(self.describe_progress())
+
+    def _warm_moves(self, progress):
+        missing = self._api.get_missing_move_ids()
+        self.moves_total = len(missing)
+        self.moves_cached = 0
+
+        for start in range(0, len(missing), self.BATCH_SIZE):
+            if self._stop_event.is_set():
+                break
+            self.moves_cached += self._api.prefetch_moves(missing[start:start + self.BATCH_SIZE])
+            if progress is not None:
+                progress(self)
+
+    def start(self, names):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, args=(names,), daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=0):
+        '''
+        Waits up to timeout seconds for the batch being warmed to be saved, until it is when timeout is None
+        '''
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def describe_progress(self):
+        return "{cached}/{total} species cached, {failed} failed, {moves_cached}/{moves_total} moves fetched".format(
+            cached=self.cached, total=self.total, failed=self.failed, moves_cached=self.moves_cached,
+            moves_total=self.moves_total)
+
+
+def load_species_list_file(filepath):
+    '''
+    One species per line, blank lines and lines starting with # are skipped
+    '''
+    with open(filepath, "r") as file:
+        lines = [line.strip().lower() for line in file]
+    return [line for line in lines if line != "" and not line.startswith("#")]
@@ -0,0 +1,127 @@
+import argparse
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+
+from batchgenerator import load_trainer_spec
+from cachewarmer import CacheWarmer, load_species_list_file
+from common import create_double_logger, EXPORT_DIR
+from exceptions import PokeApiDumpNotFoundException, InvalidTrainerSpecException, ApiRequestFailedException
+from metrics import METRICS
+from pokeapidump import PokeApiDumpImporter
+from pokemonwikiapi import PokeApi, Sqlite3, NormalizedSqlite3
+from trainerengine import TrainerGenerationEngine
+from trainerwriter import create_trainer_writer
+
+OUTPUT_FORMATS = ["json", "jsonl", "zip"]
+
+
+def import_dump(args):
+    try:
+        PokeApiDumpImporter(Sqlite3("pokeapi"), NormalizedSqlite3()).run(args.dirpath)
+        return 0
+    except PokeApiDumpNotFoundException as e:
+        create_double_logger(__name__).error(e.message)
+        return 1
+
+
+def warm_cache(args):
+    logger = create_double_logger(__name__)
+    api = PokeApi()
+    try:
+        names = get_warm_cache_names(api, args)
+    except ApiRequestFailedException as e:
+        logger.error(e.message)
+        return 1
+    except OSError as e:
+        logger.error("Failed to read species list: {}".format(e))
+        return 1
+
+    warmer = CacheWarmer(api)
+    try:
+        warmer.run(names, lambda w: logger.info(w.describe_progress()))
+    except KeyboardInterrupt:
+        logger.info("Interrupted at {progress}, run again to resume".format(progress=warmer.describe_progress()))
+        return 1
+    logger.info("Done, {progress}".format(progress=warmer.describe_progress()))
+    return 0 if warmer.failed == 0 else 1
+
+
+def get_warm_cache_names(api, args):
+    if args.generation is not None:
+        return api.get_generation_species_names(args.generation)
+    if args.list is not None:
+        return load_species_list_file(args.list)
+    return api.get_species_names()
+
+
+def generate(args):
+    try:
+        trainer_specs = load_trainer_spec(args.spec)
+    except InvalidTrainerSpecException as e:
+        create_double_logger(__name__).error(e.message)
+        return 1
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    create_double_logger(__name__).info("Generating with seed {seed}".format(seed=seed))
+
+    with create_trainer_writer(args.format, get_output_path(args)) as writer:
+        summary = TrainerGenerationEngine(PokeApi(), writer, args.workers, seed).run(trainer_specs)
+    if args.summary is not None:
+        with open(args.summary, "w") as file:
+            json.dump(summary, file, indent=2)
+
+    return 0 if len(summary["failed"]) == 0 else 1
+
+
+def get_output_path(args):
+    if args.output is not None:
+        return args.output
+    if args.format == "json":
+        return EXPORT_DIR
+    return os.path.join(EXPORT_DIR, "trainers." + args.format)
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(description="Non-interactive CobblemonTrainerGenerator commands")
+    parser.add_argument("--metrics", help="Write API, cache and rate limit metrics as JSON to this file at exit")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_dump_parser = subparsers.add_parser("import-dump", help="Load a PokeAPI data dump into the cache")
+    import_dump_parser.add_argument("dirpath", help="Directory or zip archive of the PokeAPI api-data repository")
+    import_dump_parser.set_defaults(handler=import_dump)
+
+    warm_cache_parser = subparsers.add_parser("warm-cache", help="Fetch species into the cache, resuming if stopped")
+    selection = warm_cache_parser.add_mutually_exclusive_group()
+    selection.add_argument("--generation", help="Only species of this generation, such as generation-i")
+    selection.add_argument("--list", help="Only species listed in this file, one per line")
+    warm_cache_parser.set_defaults(handler=warm_cache)
+
+    generate_parser = subparsers.add_parser("generate", help="Generate every trainer listed in a spec file")
+    generate_parser.add_argument("spec", help="JSON or YAML file listing trainers")
+    generate_parser.add_argument("--format", choices=OUTPUT_FORMATS, default="json",
+                                 help="A file per trainer, a single JSON Lines file or a zip archive")
+    generate_parser.add_argument("--output", help="Directory for json, file for jsonl and zip, defaults to export")
+    generate_parser.add_argument("--summary", help="Write timings and failures as JSON to this file")
+    generate_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    generate_parser.add_argument("--seed", type=int, help="Master seed, the same seed reproduces the same trainers")
+    generate_parser.set_defaults(handler=generate)
+
+    return parser
+
+
+def main(argv=None):
+    logging.getLogger().setLevel(logging.INFO)
+    args = create_parser().parse_args(argv)
+    if args.metrics is not None:
+        atexit.register(METRICS.dump, args.metrics)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
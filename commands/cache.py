@@ -0,0 +1,118 @@
+import inquirer
+
+from cachewarmer import CacheWarmer, load_species_list_file
+from commands.interface import Command, execute_command
+from common import create_double_logger
+from exceptions import EditCacheCommandCloseException, PokeApiDumpNotFoundException, ApiRequestFailedException
+
+WARM_ALL_SPECIES = "All species"
+WARM_GENERATION = "One generation"
+WARM_LIST_FILE = "Species list file"
+
+# Kept across menus, warming goes on in the background after the Cache menu is closed
+_warmer = None
+
+
+def stop_cache_warmer():
+    '''
+    Waits for the batch being warmed, otherwise it would be saved into the cache connection closed at exit
+    '''
+    if _warmer is not None and _warmer.is_running():
+        create_double_logger(__name__).info("Waiting for the cache warm-up to save its current batch")
+        _warmer.stop(None)
+
+
+class EditCacheCommand(Command):
+    def execute(self, trainer):
+        try:
+            self._edit_cache(trainer)
+        except EditCacheCommandCloseException:
+            pass
+
+    def _edit_cache(self, trainer):
+        while True:
+            COMMANDS = [
+                ("Return", CloseEditCacheCommand()),
+                ("Import PokeAPI dump", ImportPokeApiDumpCommand()),
+                (self._get_warm_cache_button_name(), WarmCacheCommand()),
+            ]
+            if _warmer is not None and _warmer.is_running():
+                COMMANDS.append(("Stop warming cache", StopWarmCacheCommand()))
+            answer = inquirer.prompt([inquirer.List("command", "Select command", COMMANDS)])
+            execute_command(answer["command"], trainer)
+
+    def _get_warm_cache_button_name(self):
+        if _warmer is None:
+            return "Warm cache"
+        state = "running" if _warmer.is_running() else "stopped"
+        return "Warm cache ({state}, {progress})".format(state=state, progress=_warmer.describe_progress())
+
+
+class CloseEditCacheCommand(Command):
+    def execute(self, trainer):
+        raise EditCacheCommandCloseException
+
+
+class ImportPokeApiDumpCommand(Command):
+    def __init__(self):
+        self._logger = create_double_logger(__name__)
+
+    def execute(self, trainer):
+        # Imported on first use, showing the menus needs neither requests nor the cache
+        from pokeapidump import PokeApiDumpImporter
+        from pokemonwikiapi import Sqlite3, NormalizedSqlite3
+
+        try:
+            answer = inquirer.prompt([inquirer.Text("dirpath", "PokeAPI data dump directory or zip archive")])
+            PokeApiDumpImporter(Sqlite3("pokeapi"), NormalizedSqlite3()).run(answer["dirpath"])
+        except PokeApiDumpNotFoundException as e:
+            self._logger.info(e.message)
+
+
+class WarmCacheCommand(Command):
+    def __init__(self):
+        self._logger = create_double_logger(__name__)
+
+    def execute(self, trainer):
+        global _warmer
+        # Imported on first use, showing the menus needs neither requests nor the cache
+        from pokemonwikiapi import PokeApi
+
+        if _warmer is not None and _warmer.is_running():
+            self._logger.info(_warmer.describe_progress())
+            return
+
+        api = PokeApi()
+        try:
+            names = self._get_species_names(api)
+        except ApiRequestFailedException as e:
+            self._logger.info(e.message)
+            return
+        except OSError as e:
+            self._logger.info("Failed to read species list: {}".format(e))
+            return
+
+        _warmer = CacheWarmer(api)
+        _warmer.start(names)
+        self._logger.info("Warming {count} species in the background".format(count=len(names)))
+
+    def _get_species_names(self, api):
+        choices = [WARM_ALL_SPECIES, WARM_GENERATION, WARM_LIST_FILE]
+        answer = inquirer.prompt([inquirer.List("selection", "Species to cache", choices)])
+        if answer["selection"] == WARM_GENERATION:
+            answer = inquirer.prompt([inquirer.Text("generation", "Generation", default="generation-i")])
+            return api.get_generation_species_names(answer["generation"].strip().lower())
+        if answer["selection"] == WARM_LIST_FILE:
+            answer = inquirer.prompt([inquirer.Text("filepath", "Species list file, one species per line")])
+            return load_species_list_file(answer["filepath"])
+        return api.get_species_names()
+
+
+class StopWarmCacheCommand(Command):
+    def __init__(self):
+        self._logger = create_double_logger(__name__)
+
+    def execute(self, trainer):
+        if _warmer is not None:
+            _warmer.stop()
+            self._logger.info("Stopping after the current batch, warming again resumes from the cache")
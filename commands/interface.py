@@ -1,7 +1,28 @@
 from abc import ABC, abstractmethod
 
+_profiler = None
+
 
 class Command(ABC):
     @abstractmethod
     def execute(self, trainer):
-        pass
\ No newline at end of file
+        pass
+
+
+def execute_command(command, trainer):
+    '''
+    Every command picked from a menu is run through here, so that --profile sees each of them
+    '''
+    if _profiler is None:
+        command.execute(trainer)
+    else:
+        _profiler.execute(command, trainer)
+
+
+def enable_profiling():
+    # cProfile and pstats are only loaded when asked for
+    from commands.profiler import CommandProfiler
+
+    global _profiler
+    _profiler = CommandProfiler()
+    return _profiler
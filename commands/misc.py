@@ -4,9 +4,13 @@ import os
 
 import inquirer
 
-from commands.interface import Command
+from commands.cache import stop_cache_warmer
+from commands.interface import Command, execute_command
+from commands.pokemon import stop_random_pokemon_pool
 from exceptions import CommandPromptCloseException
-from common import is_valid_json_file, load_json_file, EXPORT_DIR, IMPORT_DIR, create_double_logger
+from common import load_json_file, EXPORT_DIR, IMPORT_DIR, create_double_logger
+from importmanifest import ImportManifest, describe_entry
+from metrics import METRICS, format_metrics
 
 
 class PrintTrainerCommand(Command):
@@ -14,6 +18,11 @@ class PrintTrainerCommand(Command):
         print(json.dumps(trainer.properties, indent=2))
 
 
+class PrintStatsCommand(Command):
+    def execute(self, trainer):
+        print(format_metrics(METRICS.snapshot()))
+
+
 class ExportTrainerCommand(Command):
     def __init__(self):
         self._logger = create_double_logger(__name__)
@@ -44,19 +53,13 @@ class ExportTrainerCommand(Command):
 class ImportTrainerCommand(Command):
     def execute(self, trainer):
         commands = [("Return", CloseImportTrainerCommand())]
-        json_files = self._get_valid_json_files()
-        commands += [self._get_set_of_json_file_and_command(jf) for jf in json_files]
+        entries = ImportManifest().get_valid_entries()
+        commands += [self._get_set_of_json_file_and_command(e) for e in entries]
         answer = inquirer.prompt([inquirer.List("command", "Select to import", commands)])
-        answer["command"].execute(trainer)
-
-    def _get_valid_json_files(self):
-        return list(filter(self._is_valid_json_file, os.listdir(IMPORT_DIR)))
-
-    def _is_valid_json_file(self, filename):
-        return is_valid_json_file(self._get_filepath(filename))
+        execute_command(answer["command"], trainer)
 
-    def _get_set_of_json_file_and_command(self, filename):
-        return filename, ImportTrainerFileCommand(self._get_filepath(filename))
+    def _get_set_of_json_file_and_command(self, entry):
+        return describe_entry(entry), ImportTrainerFileCommand(self._get_filepath(entry["filename"]))
 
     def _get_filepath(self, filename):
         return os.path.join(IMPORT_DIR, filename)
@@ -64,6 +67,8 @@ class ImportTrainerCommand(Command):
 
 class CloseCommandPromptCommand(Command):
     def execute(self, trainer):
+        stop_random_pokemon_pool()
+        stop_cache_warmer()
         raise CommandPromptCloseException
 
 
@@ -2,13 +2,70 @@ import json
 
 import inquirer
 
-from commands.interface import Command
+from commands.interface import Command, execute_command
 from common import create_double_logger
 from exceptions import PokemonCreationFailedException, EditTeamCommandCloseException, \
-    EditPokemonCommandCloseException, InvalidPokemonLevelException, EmptyPokemonSlotException
+    EditPokemonCommandCloseException, InvalidPokemonLevelException, EmptyPokemonSlotException, \
+    ApiRequestFailedException, TeamBalancingFailedException
 from pokemonfactory import RandomizedPokemonFactory, assert_valid_pokemon_level, \
-    get_pokemon_name, select_random_nature, select_random_moveset
-from pokemonwikiapi import PokeApi as PokemonWikiApi
+    get_pokemon_name, select_random_nature, select_moveset, TEAM_SIZE, MAX_LEVEL
+from pokemonpool import RandomPokemonPool
+from teambalancer import BalancedTeamSelector
+
+# Seconds closing waits for a Pokemon being created in the pool, it is dropped after
+STOP_POOL_TIMEOUT = 5
+
+# Random Pokemons created ahead of time for AddRandomPokemonCommand, kept for the whole session
+_pool = None
+
+
+def create_pokemon_wiki_api():
+    # Imported on first use, showing the menus needs neither requests nor the cache
+    from pokemonwikiapi import PokeApi
+    return PokeApi()
+
+
+def start_random_pokemon_pool():
+    '''
+    Started on the first random Pokemon asked for rather than at launch, so that the pool neither delays the first menu
+    nor spends the rate limit of sessions never adding random Pokemons
+    '''
+    global _pool
+    if _pool is None:
+        _pool = RandomPokemonPool(create_pokemon_wiki_api).start()
+
+
+def stop_random_pokemon_pool():
+    if _pool is not None:
+        _pool.stop(STOP_POOL_TIMEOUT)
+
+
+def reroll_movesets(api, pokemons):
+    '''
+    Draws new movesets from the moves each Pokemon learns by leveling up to its level
+    Every moveset is drawn before any is set, so a failed lookup leaves all of them as they were
+    :return: Pokemons whose moveset was re-rolled
+    :raise ApiRequestFailedException: nothing was re-rolled
+    '''
+    names = [api.get_species_name(get_pokemon_name(p)) for p in pokemons]
+    api.prefetch(list(dict.fromkeys(names)))
+    movesets = []
+    for pokemon, name in zip(pokemons, names):
+        moves = api.get_pokemon_move_details_at_level(name, pokemon["level"])
+        movesets.append(select_moveset(moves, api.get_pokemon_types(name)) if moves else None)
+
+    rerolled = []
+    for pokemon, moveset in zip(pokemons, movesets):
+        if moveset is not None:
+            pokemon["moveset"] = moveset
+            rerolled.append(pokemon)
+    return rerolled
+
+
+def confirm_reroll_movesets():
+    answer = inquirer.prompt([inquirer.Confirm("confirm", message="Re-roll movesets for the new level?",
+                                               default=True)])
+    return answer["confirm"]
 
 
 class EditTeamCommand(Command):
@@ -32,7 +89,7 @@ class EditTeamCommand(Command):
                 ("Team Level", EditTeamLevelCommand()),
             ]
             answer = inquirer.prompt([inquirer.List("button", "Select Pokemon", buttons)])
-            answer["button"].execute(trainer)
+            execute_command(answer["button"], trainer)
 
     def _get_button_name(self, team, slot):
         try:
@@ -70,9 +127,10 @@ class AddPokemonCommand(Command):
             ("Return", CloseAddPokemonCommand()),
             ("Name", AddPokemonByNameCommand()),
             ("Random", AddRandomPokemonCommand()),
+            ("Balanced team", AddBalancedTeamCommand()),
         ]
         answer = inquirer.prompt([inquirer.List("command", "Select command", COMMANDS)])
-        answer["command"].execute(trainer)
+        execute_command(answer["command"], trainer)
 
 
 class CloseAddPokemonCommand(Command):
@@ -87,7 +145,7 @@ class AddPokemonByNameCommand(Command):
     def execute(self, trainer):
         try:
             name = self._ask_pokemon_name()
-            pokemon = RandomizedPokemonFactory(PokemonWikiApi()).create(name)
+            pokemon = RandomizedPokemonFactory(create_pokemon_wiki_api()).create(name)
             trainer.properties["team"].append(pokemon)
             cap_name = get_pokemon_name(pokemon).capitalize()
             self._logger.info("Added {pokemon} to {trainer}".format(pokemon=cap_name, trainer=trainer.name))
@@ -105,14 +163,64 @@ class AddRandomPokemonCommand(Command):
 
     def execute(self, trainer):
         try:
-            name = PokemonWikiApi().get_random_pokemon_name()
-            pokemon = RandomizedPokemonFactory(PokemonWikiApi()).create(name)
+            pokemon = self._pop_or_create_pokemon()
             trainer.properties["team"].append(pokemon)
             cap_name = get_pokemon_name(pokemon).capitalize()
             self._logger.info("Added {pokemon} to {trainer}".format(pokemon=cap_name, trainer=trainer.name))
-        except PokemonCreationFailedException as e:
+        except (PokemonCreationFailedException, ApiRequestFailedException) as e:
             self._logger.info(e.message)
 
+    def _pop_or_create_pokemon(self):
+        pokemon = _pool.pop() if _pool is not None else None
+        if pokemon is not None:
+            return pokemon
+
+        api = create_pokemon_wiki_api()
+        name = api.get_random_pokemon_name()
+        pokemon = RandomizedPokemonFactory(api).create(name)
+        # Only after this one is created, the pool would otherwise take turns with it at the rate limiter
+        start_random_pokemon_pool()
+        return pokemon
+
+
+class AddBalancedTeamCommand(Command):
+    '''
+    Fills the empty slots with species balancing the team's types, at most at the trainer's partyMaximumLevel
+    '''
+
+    def __init__(self):
+        self._logger = create_double_logger(__name__)
+
+    def execute(self, trainer):
+        team = trainer.properties["team"]
+        count = TEAM_SIZE - len(team)
+        if count <= 0:
+            self._logger.info("Team of {trainer} is already full".format(trainer=trainer.name))
+            return
+
+        try:
+            pokemons = self._create_balanced_pokemons(trainer, count)
+        except (PokemonCreationFailedException, TeamBalancingFailedException, ApiRequestFailedException) as e:
+            self._logger.info(e.message)
+            return
+
+        team.extend(pokemons)
+        cap_names = ", ".join(get_pokemon_name(p).capitalize() for p in pokemons)
+        self._logger.info("Added {pokemons} to {trainer}".format(pokemons=cap_names, trainer=trainer.name))
+
+    def _create_balanced_pokemons(self, trainer, count):
+        api = create_pokemon_wiki_api()
+        species_types = api.get_eligible_pokemon_types()
+        # Team members hold species without hyphens, the catalog spells them like PokeAPI does
+        catalog_names = {n.replace("-", ""): n for n in species_types}
+        team_names = [catalog_names.get(get_pokemon_name(p), get_pokemon_name(p)) for p in trainer.properties["team"]]
+        team_types = [api.get_pokemon_types(n) for n in team_names]
+        names = BalancedTeamSelector(species_types).select(count, team_types, team_names)
+
+        factory = RandomizedPokemonFactory(api)
+        level = min(factory.get_default_level(), trainer.properties.get("partyMaximumLevel", MAX_LEVEL))
+        return factory.create_team(names, [level] * len(names))
+
 
 class EditPokemonCommand(Command):
     def __init__(self, slot):
@@ -136,7 +244,7 @@ class EditPokemonCommand(Command):
                 ("Remove", ConfirmRemovePokemonCommand(self._slot))
             ]
             answer = inquirer.prompt([inquirer.List("command", "Select action", COMMANDS)])
-            answer["command"].execute(trainer)
+            execute_command(answer["command"], trainer)
 
 
 class CloseEditPokemonCommand(Command):
@@ -199,9 +307,20 @@ class EditPokemonLevelCommand(Command):
             pokemon["level"] = level
             cap_name = get_pokemon_name(pokemon).capitalize()
             self._logger.info("Set level of {pokemon} to {level}".format(pokemon=cap_name, level=level))
+            if confirm_reroll_movesets():
+                self._reroll_moveset(pokemon)
         except InvalidPokemonLevelException:
             self._logger.info("Invalid value was given for Pokemon level")
 
+    def _reroll_moveset(self, pokemon):
+        cap_name = get_pokemon_name(pokemon).capitalize()
+        try:
+            if reroll_movesets(create_pokemon_wiki_api(), [pokemon]):
+                self._logger.info("Set moveset of {pokemon} to {moveset}".format(pokemon=cap_name,
+                                                                                 moveset=pokemon["moveset"]))
+        except ApiRequestFailedException as e:
+            self._logger.info(e.message)
+
     def _ask_pokemon_level(self, pokemon):
         answer = inquirer.prompt([inquirer.Text("level", "Pokemon Level", default=pokemon["level"])])
         return int(answer["level"])
@@ -222,7 +341,7 @@ class EditPokemonAbilityCommand(Command):
         self._logger.info("Set ability of {pokemon} to {ability}".format(pokemon=cap_name, ability=ability))
 
     def _ask_pokemon_ability(self, name):
-        abilities = PokemonWikiApi().get_pokemon_abilities(name)
+        abilities = create_pokemon_wiki_api().get_pokemon_abilities(name)
         answer = inquirer.prompt([inquirer.List("ability", "Pokemon Ability", abilities)])
         return answer["ability"]
 
@@ -260,13 +379,16 @@ class EditPokemonMovesetCommand(Command):
 
         team = trainer.properties["team"]
         pokemon = team[self._slot]
-        name = get_pokemon_name(pokemon)
-        moves = PokemonWikiApi().get_pokemon_moves(name)
-        moveset = select_random_moveset(moves)
-        pokemon["moveset"] = moveset
+        try:
+            if not reroll_movesets(create_pokemon_wiki_api(), [pokemon]):
+                return
+        except ApiRequestFailedException as e:
+            self._logger.info(e.message)
+            return
 
         cap_name = get_pokemon_name(pokemon).capitalize()
-        self._logger.info("Set moveset of {pokemon} to {moveset}".format(pokemon=cap_name, moveset=moveset))
+        self._logger.info("Set moveset of {pokemon} to {moveset}".format(pokemon=cap_name,
+                                                                         moveset=pokemon["moveset"]))
 
     def _confirm_randomize_moveset(self):
         answer = inquirer.prompt([inquirer.Confirm("confirm", message="Randomize moveset?", default=False)])
@@ -295,9 +417,19 @@ class EditTeamLevelCommand(Command):
             for pokemon in team:
                 pokemon["level"] = level
             self._logger.info("Set team level of {trainer} to {level}".format(trainer=trainer.name, level=level))
+            if team and confirm_reroll_movesets():
+                self._reroll_movesets(trainer)
         except InvalidPokemonLevelException:
             self._logger.info("Invalid value was given for Pokemon level")
 
+    def _reroll_movesets(self, trainer):
+        try:
+            rerolled = reroll_movesets(create_pokemon_wiki_api(), trainer.properties["team"])
+            self._logger.info("Re-rolled movesets of {count} Pokemons of {trainer}".format(count=len(rerolled),
+                                                                                          trainer=trainer.name))
+        except ApiRequestFailedException as e:
+            self._logger.info(e.message)
+
     def _ask_team_level(self):
         answer = inquirer.prompt([inquirer.Text("level", "Team Level")])
         return int(answer["level"])
@@ -0,0 +1,76 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+
+REPORT_LINES = 40
+
+
+class CommandProfiler:
+    '''
+    Keeps a cProfile and wall-clock timings per command class
+    A command opening a submenu is paused while the command picked from it runs, so each class only holds its own work
+    '''
+
+    def __init__(self):
+        self._profiles = {}
+        self._timings = {}
+        self._stack = []
+
+    def execute(self, command, trainer):
+        name = command.__class__.__name__
+        profile = self._profiles.setdefault(name, cProfile.Profile())
+        frame = {"name": name, "profile": profile, "start": time.perf_counter(), "children": 0.0}
+
+        if self._stack:
+            self._stack[-1]["profile"].disable()
+        self._stack.append(frame)
+        profile.enable()
+        try:
+            command.execute(trainer)
+        finally:
+            profile.disable()
+            self._stack.pop()
+            seconds = time.perf_counter() - frame["start"]
+            self._record(frame, seconds)
+            if self._stack:
+                self._stack[-1]["children"] += seconds
+                self._stack[-1]["profile"].enable()
+
+    def _record(self, frame, seconds):
+        timing = self._timings.setdefault(frame["name"], {"calls": 0, "seconds": 0.0, "ownSeconds": 0.0})
+        timing["calls"] += 1
+        timing["seconds"] += seconds
+        timing["ownSeconds"] += seconds - frame["children"]
+
+    def write_report(self, dirpath):
+        '''
+        Writes <command>.prof for every command class, timings.json and report.txt sorted by cumulative time
+        '''
+        os.makedirs(dirpath, exist_ok=True)
+        for name, profile in self._profiles.items():
+            profile.dump_stats(os.path.join(dirpath, name + ".prof"))
+
+        timings = dict(sorted(self._timings.items(), key=lambda t: t[1]["ownSeconds"], reverse=True))
+        with open(os.path.join(dirpath, "timings.json"), "w") as file:
+            json.dump(timings, file, indent=2)
+
+        with open(os.path.join(dirpath, "report.txt"), "w") as file:
+            file.write(self._format_report(timings))
+
+    def _format_report(self, timings):
+        stream = io.StringIO()
+        for name, timing in timings.items():
+            stream.write("{name}: {calls} calls, {seconds:.3f} s, {own:.3f} s without submenus\n".format(
+                name=name, calls=timing["calls"], seconds=timing["seconds"], own=timing["ownSeconds"]))
+
+        profiles = [p for p in self._profiles.values() if p.getstats()]
+        if profiles:
+            stream.write("\n")
+            stats = pstats.Stats(profiles[0], stream=stream)
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_LINES)
+        return stream.getvalue()
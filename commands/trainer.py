@@ -1,6 +1,6 @@
 import inquirer
 
-from commands.interface import Command
+from commands.interface import Command, execute_command
 from common import load_json_file, create_double_logger
 from exceptions import EditTrainerCommandCloseException, InvalidPokemonLevelException
 from pokemonfactory import assert_valid_pokemon_level
@@ -27,7 +27,7 @@ class EditTrainerCommand(Command):
                 ("partyMaximumLevel", EditPartyMaximumLevelCommand()),
             ]
             answer = inquirer.prompt([inquirer.List("command", "Select to edit", COMMANDS)])
-            answer["command"].execute(trainer)
+            execute_command(answer["command"], trainer)
 
 
 class CloseEditTrainerCommand(Command):
@@ -1,13 +1,25 @@
+import atexit
 import json
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from exceptions import LruCacheMissException
 
 LOG_DIR = "logs"
 EXPORT_DIR = "export"
 IMPORT_DIR = "import"
 
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
 CONSOLE_HANDLER = logging.StreamHandler()
 CONSOLE_HANDLER.setLevel(logging.INFO)
 
@@ -17,14 +29,6 @@ def load_json_file(filepath):
         return json.load(file)
 
 
-def is_valid_json_file(filepath):
-    try:
-        load_json_file(filepath)
-        return True
-    except (json.JSONDecodeError, FileNotFoundError):
-        return False
-
-
 def resource_path(relative_path):
     return os.path.join(_base_path(), relative_path)
 
@@ -45,6 +49,37 @@ def create_double_logger(name):
     return logger
 
 
+def configure_file_logging(filepath, level=logging.DEBUG, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT):
+    '''
+    Records are put on a queue and written by a listener thread, so the thread logging never waits on the file
+    The console handler stays synchronous, its messages answer the prompt the user is looking at
+    '''
+    file_handler = logging.handlers.RotatingFileHandler(filepath, maxBytes=max_bytes, backupCount=backup_count,
+                                                        encoding="utf-8", delay=True)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setLevel(level)
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+
+    root = logging.getLogger()
+    # Console messages are INFO, a quieter file must not silence them
+    root.setLevel(min(level, logging.INFO))
+    root.addHandler(queue_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def stop_file_logging(listener):
+    '''
+    Writes out every queued record, otherwise done at exit
+    '''
+    atexit.unregister(listener.stop)
+    listener.stop()
+
+
 def to_lowercase(string):
     if len(string) > 0:
         return string[0].lower() + string[1:]
@@ -52,16 +87,110 @@ def to_lowercase(string):
         return string
 
 
-class CooldownTimer:
-    def __init__(self, cooldown):
-        self._cooldown = cooldown
-        self._timestamp = time.time()
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._timestamp = time.monotonic()
+        self._lock = threading.Lock()
         self._logger = create_double_logger(__name__)
 
-    def is_elapsed_cooldown(self):
-        elapsed_time = time.time() - self._timestamp
-        return elapsed_time > self._cooldown
-
-    def reset(self):
-        self._timestamp = time.time()
-        self._logger.debug("Reset cooldown timer")
+    def acquire(self):
+        delay = self._reserve()
+        if delay > 0:
+            self._logger.debug("Wait {:.3f} seconds for rate limit".format(delay))
+            time.sleep(delay)
+
+    def _reserve(self):
+        """
+        Takes a token even when the bucket is empty, so that waiters are served in order of arrival
+        :return: seconds to wait until the taken token becomes available
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self._rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._timestamp) * self._rate)
+        self._timestamp = now
+
+
+class SingleFlight:
+    '''
+    Runs one call per key at a time, callers asking for a key while its call runs wait for that call's result
+    '''
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, function, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = Future()
+        if not is_leader:
+            return call.result()
+
+        try:
+            result = function(*args)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class LruCache:
+    '''
+    Locked, so that the menus and background workers can share one
+    '''
+
+    def __init__(self, capacity):
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                raise LruCacheMissException
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
@@ -54,5 +54,32 @@ class CachedResponseNotExistException(Exception):
     pass
 
 
-class GenerationIxPokemonException(Exception):
+class LruCacheMissException(Exception):
     pass
+
+
+class PokeApiDumpNotFoundException(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+class EditCacheCommandCloseException(Exception):
+    pass
+
+
+class CachedSpeciesNotExistException(Exception):
+    pass
+
+
+class EligibleSpeciesIndexNotExistException(Exception):
+    pass
+
+
+class InvalidTrainerSpecException(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+class TeamBalancingFailedException(Exception):
+    def __init__(self, message):
+        self.message = message
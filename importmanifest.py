@@ -0,0 +1,110 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from common import create_double_logger, IMPORT_DIR
+
+MANIFEST_FILEPATH = "import_manifest.json"
+# Entries of older versions lack fields describe_entry reads, so they are validated again
+MANIFEST_VERSION = 2
+VALIDATE_WORKERS = 8
+
+
+class ImportManifest:
+    '''
+    Remembers which files in the import directory are valid trainers, keyed by file name, size and mtime
+    Only new or changed files are parsed again, the manifest is kept outside the import directory
+    '''
+
+    def __init__(self, dirpath=IMPORT_DIR, filepath=MANIFEST_FILEPATH):
+        self._logger = create_double_logger(__name__)
+        self._dirpath = dirpath
+        self._filepath = filepath
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self._filepath, "r") as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+        if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest.get("entries", {})
+
+    def refresh(self):
+        '''
+        :return: entries of every file in the import directory, sorted by file name
+        '''
+        stats = self._scan()
+        stale = [f for f, s in stats.items() if not self._is_fresh(f, s)]
+
+        with ThreadPoolExecutor(max_workers=VALIDATE_WORKERS) as executor:
+            for filename, entry in zip(stale, executor.map(self._validate, stale)):
+                self._entries[filename] = {**stats[filename], **entry}
+
+        removed = set(self._entries) - set(stats)
+        for filename in removed:
+            del self._entries[filename]
+
+        if stale or removed:
+            self._logger.debug("Validated {stale} files, removed {removed} from manifest".format(
+                stale=len(stale), removed=len(removed)))
+            self._save()
+
+        return [{"filename": f, **self._entries[f]} for f in sorted(stats)]
+
+    def get_valid_entries(self):
+        return [e for e in self.refresh() if e["valid"]]
+
+    def _scan(self):
+        stats = {}
+        for entry in os.scandir(self._dirpath):
+            if entry.is_file():
+                stat = entry.stat()
+                stats[entry.name] = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        return stats
+
+    def _is_fresh(self, filename, stat):
+        entry = self._entries.get(filename)
+        return entry is not None and entry["size"] == stat["size"] and entry["mtime"] == stat["mtime"]
+
+    def _validate(self, filename):
+        try:
+            with open(os.path.join(self._dirpath, filename), "r") as file:
+                properties = json.load(file)
+        except (OSError, ValueError):
+            return {"valid": False, "summary": None}
+        return {"valid": True, "summary": summarize_trainer(properties, os.path.splitext(filename)[0])}
+
+    def _save(self):
+        # Written aside and swapped in, so an interrupted save never leaves a broken manifest behind
+        temporary_filepath = self._filepath + ".tmp"
+        with open(temporary_filepath, "w") as file:
+            json.dump({"version": MANIFEST_VERSION, "entries": self._entries}, file)
+        os.replace(temporary_filepath, self._filepath)
+
+
+def summarize_trainer(properties, name):
+    '''
+    :param name: trainer's name, Export names the file after it
+    '''
+    team = properties.get("team", []) if isinstance(properties, dict) else []
+    if not isinstance(team, list):
+        team = []
+
+    pokemon = [p for p in team if isinstance(p, dict)]
+    return {
+        "name": name,
+        "team": [str(p.get("species", "")).removeprefix("cobblemon:") for p in pokemon],
+        "levels": [p.get("level") for p in pokemon],
+    }
+
+
+def describe_entry(entry):
+    summary = entry["summary"]
+    team = ", ".join(s if l is None else "{species} {level}".format(species=s, level=l)
+                     for s, l in zip(summary["team"], summary["levels"]))
+    description = "{name}: {team}".format(name=summary["name"], team=team) if team else summary["name"]
+    return "{description} ({filename})".format(description=description, filename=entry["filename"])
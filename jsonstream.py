@@ -0,0 +1,73 @@
+import json
+import re
+from json import JSONDecodeError
+from json.decoder import scanstring
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+def iter_fields(text, fields, streamed_fields=()):
+    '''
+    Walks the top-level object of a JSON document and yields (key, value) for the keys in fields
+    Arrays under streamed_fields are yielded one element at a time as (key, element), so only a single element is ever
+    decoded at once, values of every other key are decoded by the C scanner and dropped straight away
+    :raise JSONDecodeError: text is not a JSON object
+    '''
+    index = _expect(text, _skip(text, 0), "{")
+    if text.startswith("}", index):
+        index += 1
+    else:
+        while True:
+            if not text.startswith('"', index):
+                raise JSONDecodeError("Expecting property name enclosed in double quotes", text, index)
+            key, index = scanstring(text, index + 1)
+            index = _expect(text, _skip(text, index), ":")
+
+            if key in streamed_fields and text.startswith("[", index):
+                index = yield from _iter_array(text, index + 1, key)
+            else:
+                value, index = _decoder.raw_decode(text, index)
+                if key in fields:
+                    yield key, value
+
+            index = _skip(text, index)
+            if text.startswith(",", index):
+                index = _skip(text, index + 1)
+                continue
+            index = _expect(text, index, "}")
+            break
+
+    if _skip(text, index) != len(text):
+        raise JSONDecodeError("Extra data", text, index)
+
+
+def _iter_array(text, index, key):
+    '''
+    :return: index after the closing bracket
+    '''
+    index = _skip(text, index)
+    if text.startswith("]", index):
+        return index + 1
+
+    while True:
+        element, index = _decoder.raw_decode(text, index)
+        yield key, element
+        index = _skip(text, index)
+        if text.startswith(",", index):
+            index = _skip(text, index + 1)
+            continue
+        return _expect(text, index, "]")
+
+
+def _skip(text, index):
+    return WHITESPACE.match(text, index).end()
+
+
+def _expect(text, index, char):
+    '''
+    :return: index after char and any whitespace following it
+    '''
+    if not text.startswith(char, index):
+        raise JSONDecodeError("Expecting {!r}".format(char), text, index)
+    return _skip(text, index + 1)
@@ -1,10 +1,17 @@
+import argparse
+import atexit
 import logging
 import os
 from datetime import datetime
 
-from common import LOG_DIR, EXPORT_DIR, IMPORT_DIR
+from commands.interface import enable_profiling
+from common import LOG_DIR, EXPORT_DIR, IMPORT_DIR, configure_file_logging
+from metrics import METRICS
 from trainergenerator import TrainerGenerator
 
+LOG_FILENAME = "trainergenerator.log"
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+
 
 def create_log_dir_if_not_exist():
     if not os.path.exists(LOG_DIR):
@@ -22,19 +29,44 @@ def create_import_dir_if_not_exist():
 
 
 def get_log_filepath():
-    extension = ".log"
+    return os.path.join(LOG_DIR, LOG_FILENAME)
+
+
+def get_profile_dirpath():
     current_date_time = datetime.now()
-    filename = current_date_time.strftime('%Y-%m-%d') + extension
-    return os.path.join(LOG_DIR, filename)
+    dirname = current_date_time.strftime('%Y-%m-%d-%H%M%S') + "-profile"
+    return os.path.join(LOG_DIR, dirname)
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(description="Interactive CobblemonTrainerGenerator")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile every command and write the results to {} on close".format(LOG_DIR))
+    parser.add_argument("--metrics", help="Write API, cache and rate limit metrics as JSON to this file at exit")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="DEBUG", help="Lowest level written to the log file")
+    return parser
 
 
-create_log_dir_if_not_exist()
-create_export_dir_if_not_exist()
-create_import_dir_if_not_exist()
+def main(argv=None):
+    '''
+    Nothing happens on import, so that measuring startup and importing helpers from here stay side effect free
+    '''
+    args = create_parser().parse_args(argv)
+
+    create_log_dir_if_not_exist()
+    create_export_dir_if_not_exist()
+    create_import_dir_if_not_exist()
+
+    configure_file_logging(get_log_filepath(), logging.getLevelName(args.log_level))
+    if args.metrics is not None:
+        atexit.register(METRICS.dump, args.metrics)
+
+    if args.profile:
+        profiler = enable_profiling()
+        atexit.register(profiler.write_report, get_profile_dirpath())
+    TrainerGenerator().run()
 
-logging.basicConfig(filename=get_log_filepath(),
-                    level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Press the green button in the gutter to run the script.
 if __name__ == '__main__':
-    TrainerGenerator().run()
+    main()
@@ -0,0 +1,103 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds of histogram buckets in milliseconds, the last bucket holds everything slower
+BUCKET_BOUNDS_MS = [0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000]
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def observe(self, seconds):
+        milliseconds = seconds * 1000
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, milliseconds)] += 1
+
+    def quantile(self, q):
+        '''
+        :return: upper bound of the bucket the quantile falls in, or the maximum for the last bucket
+        '''
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "totalMs": self.total,
+            "meanMs": self.total / self.count if self.count > 0 else 0.0,
+            "p50Ms": self.quantile(0.5),
+            "p95Ms": self.quantile(0.95),
+            "maxMs": self.max,
+            "buckets": dict(zip([str(b) for b in BUCKET_BOUNDS_MS] + ["inf"], self.buckets)),
+        }
+
+
+class Metrics:
+    '''
+    Counters and timing histograms of the whole process, named like "cache.hit.pokemon-species" or "db.read"
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name, seconds):
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram()
+            self._histograms[name].observe(seconds)
+
+    @contextmanager
+    def time(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(sorted(self._counters.items())),
+                "histograms": {k: self._histograms[k].to_dict() for k in sorted(self._histograms)},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def dump(self, filepath):
+        with open(filepath, "w") as file:
+            json.dump(self.snapshot(), file, indent=2)
+
+
+METRICS = Metrics()
+
+
+def format_metrics(snapshot):
+    lines = ["{name}: {value}".format(name=k, value=v) for k, v in snapshot["counters"].items()]
+    for name, histogram in snapshot["histograms"].items():
+        lines.append("{name}: {count} in {total:.1f} ms, mean {mean:.2f} ms, p95 {p95:.2f} ms, max {max:.2f} ms"
+                     .format(name=name, count=histogram["count"], total=histogram["totalMs"],
+                             mean=histogram["meanMs"], p95=histogram["p95Ms"], max=histogram["maxMs"]))
+    return "\n".join(lines) if lines else "Nothing measured yet"
@@ -0,0 +1,93 @@
+import itertools
+import random
+
+from typechart import TYPE_NAMES
+
+MOVESET_SIZE = 4
+TYPE_BITS = {t: 1 << i for i, t in enumerate(TYPE_NAMES)}
+STATUS_DAMAGE_CLASS = "status"
+STAB_MULTIPLIER = 1.5
+# Moves like Electro Ball have no fixed power
+VARIABLE_POWER = 60
+# A move of 100 power is worth one point, every distinct attacking type three quarters
+COVERAGE_WEIGHT = 0.75
+# C(12, 4) = 495 combinations are scored per Pokemon
+CANDIDATE_LIMIT = 12
+# Any combination scoring within this fraction of the best one may be picked, so movesets still vary
+SCORE_TOLERANCE = 0.1
+
+
+def has_move_metadata(moves):
+    return all(m.type is not None for m in moves)
+
+
+def select_coverage_moveset(moves, pokemon_types, rng=random):
+    '''
+    Picks the moves with the most same-type attack bonus damage and distinct attacking types among them
+    Only the CANDIDATE_LIMIT best candidates are enumerated, every move's value and type are held in parallel lists
+    and each type is a bit, so scoring a combination is a few additions and an or
+    :param moves: Moves with metadata, see has_move_metadata
+    :return: names of the picked moves
+    '''
+    if len(moves) <= MOVESET_SIZE:
+        return [m.name for m in moves]
+
+    candidates = list(moves)
+    # Shuffled first, so that the stable sorts below break ties at random
+    rng.shuffle(candidates)
+    values = [get_move_value(m, pokemon_types) for m in candidates]
+    order = prune_candidates(candidates, values)
+    names = [candidates[i].name for i in order]
+    scores = [values[i] for i in order]
+    masks = [get_type_bit(candidates[i]) for i in order]
+
+    scored = []
+    for combination in itertools.combinations(range(len(order)), MOVESET_SIZE):
+        mask = 0
+        score = 0.0
+        for i in combination:
+            mask |= masks[i]
+            score += scores[i]
+        scored.append((score + COVERAGE_WEIGHT * bin(mask).count("1"), combination))
+
+    best = max(s for s, _ in scored)
+    picks = [c for s, c in scored if s >= best * (1 - SCORE_TOLERANCE)]
+    return [names[i] for i in rng.choice(picks)]
+
+
+def prune_candidates(moves, values):
+    '''
+    Keeps the most valuable move of every attacking type first, so pruning never drops coverage a weaker move adds,
+    then the most valuable of the rest
+    :return: indices into moves, at most CANDIDATE_LIMIT
+    '''
+    by_value = sorted(range(len(moves)), key=lambda i: values[i], reverse=True)
+    best_of_type = {}
+    for i in by_value:
+        if values[i] > 0:
+            best_of_type.setdefault(moves[i].type, i)
+
+    kept = list(best_of_type.values())[:CANDIDATE_LIMIT]
+    chosen = set(kept)
+    kept += [i for i in by_value if i not in chosen][:CANDIDATE_LIMIT - len(kept)]
+    return kept
+
+
+def get_move_value(move, pokemon_types):
+    '''
+    :return: expected damage of the move in units of a 100 power move, 0 for status moves
+    '''
+    if move.damage_class == STATUS_DAMAGE_CLASS:
+        return 0.0
+
+    power = move.power if move.power is not None else VARIABLE_POWER
+    # Moves without accuracy never miss
+    accuracy = move.accuracy if move.accuracy is not None else 100
+    value = power * accuracy / 10000
+    return value * STAB_MULTIPLIER if move.type in pokemon_types else value
+
+
+def get_type_bit(move):
+    if move.damage_class == STATUS_DAMAGE_CLASS:
+        return 0
+    return TYPE_BITS.get(move.type, 0)
@@ -0,0 +1,194 @@
+import json
+import os
+import posixpath
+import zipfile
+
+from common import create_double_logger
+from exceptions import PokeApiDumpNotFoundException
+from pokemonwikiapi import CachedResponse, PokeApi, API_BASE_URL, extract_pokemon_document
+
+DUMP_API_PATH = "/api/v2/"
+INDEX_FILENAME = "index.json"
+SPECIES_LIST_PATH = "pokemon-species/" + INDEX_FILENAME
+
+
+def find_api_dirpath(dirpath):
+    candidates = [dirpath, os.path.join(dirpath, "api", "v2"), os.path.join(dirpath, "data", "api", "v2")]
+    for candidate in candidates:
+        if os.path.isdir(os.path.join(candidate, "pokemon-species")):
+            return candidate
+    raise PokeApiDumpNotFoundException("PokeAPI data dump does not exist in {}".format(dirpath))
+
+
+def open_dump(path):
+    '''
+    :param path: directory of the api-data repository or a zip archive of it, like the one GitHub serves
+    '''
+    if os.path.isfile(path) and zipfile.is_zipfile(path):
+        return ZipDump(path)
+    return DirectoryDump(find_api_dirpath(path))
+
+
+class DirectoryDump:
+    def __init__(self, api_dirpath):
+        self._api_dirpath = api_dirpath
+
+    def get_index(self, endpoint):
+        filepath = os.path.join(self._api_dirpath, endpoint, INDEX_FILENAME)
+        return filepath if os.path.isfile(filepath) else None
+
+    def get_documents(self, endpoint):
+        dirpath = os.path.join(self._api_dirpath, endpoint)
+        if not os.path.isdir(dirpath):
+            return []
+        filepaths = [os.path.join(e.path, INDEX_FILENAME) for e in os.scandir(dirpath) if e.is_dir()]
+        return list(filter(os.path.isfile, filepaths))
+
+    def read_text(self, filepath):
+        with open(filepath, "r", encoding="utf-8") as file:
+            return file.read()
+
+    def close(self):
+        pass
+
+
+class ZipDump:
+    '''
+    Members are read from the api/v2 directory holding pokemon-species/index.json, wherever it is in the archive
+    Members under it with . or .. segments and repeated members are skipped with a warning, so a crafted archive
+    can neither slip a document in from elsewhere nor shadow one with a second copy, the rest of the repository
+    is skipped quietly
+    '''
+
+    def __init__(self, filepath):
+        self._logger = create_double_logger(__name__)
+        self._archive = zipfile.ZipFile(filepath)
+        try:
+            self._members = self._index_members(filepath)
+        except PokeApiDumpNotFoundException:
+            self._archive.close()
+            raise
+
+    def _index_members(self, filepath):
+        infos = [i for i in self._archive.infolist() if not i.is_dir()]
+        prefixes = [i.filename[:-len(SPECIES_LIST_PATH)] for i in infos
+                    if i.filename.endswith("/" + SPECIES_LIST_PATH) and is_safe_member_name(i.filename)]
+        if len(prefixes) == 0:
+            raise PokeApiDumpNotFoundException("PokeAPI data dump does not exist in {}".format(filepath))
+        prefix = min(prefixes, key=len)
+
+        members = {}
+        for info in infos:
+            if not info.filename.startswith(prefix):
+                # The rest of the repository (README, scripts, ...) is expected next to the api data
+                self._logger.debug("Skipped {name}, it is outside of {prefix}".format(name=info.filename, prefix=prefix))
+            elif not is_safe_member_name(info.filename):
+                self._logger.warning("Skipped {name}, it leaves {prefix}".format(name=info.filename, prefix=prefix))
+            elif info.filename[len(prefix):] in members:
+                self._logger.warning("Skipped {name}, it is in the archive more than once".format(name=info.filename))
+            else:
+                members[info.filename[len(prefix):]] = info
+        return members
+
+    def get_index(self, endpoint):
+        return self._members.get(posixpath.join(endpoint, INDEX_FILENAME))
+
+    def get_documents(self, endpoint):
+        parts = [(p.split("/"), info) for p, info in self._members.items()]
+        return [info for path, info in parts if len(path) == 3 and path[0] == endpoint and path[2] == INDEX_FILENAME]
+
+    def read_text(self, info):
+        return self._archive.read(info).decode("utf-8")
+
+    def close(self):
+        self._archive.close()
+
+
+def is_safe_member_name(name):
+    return not name.startswith("/") and "\\" not in name and posixpath.normpath(name) == name
+
+
+class PokeApiDumpImporter:
+    '''
+    Loads a PokeAPI static data dump (https://github.com/PokeAPI/api-data) into the response cache
+    Documents are stored under the same urls PokeApi looks them up with
+    '''
+    BATCH_SIZE = 200
+
+    def __init__(self, database, catalog):
+        self._logger = create_double_logger(__name__)
+        self._database = database
+        self._catalog = catalog
+        self.count = 0
+
+    def run(self, path):
+        '''
+        :param path: see open_dump
+        '''
+        dump = open_dump(path)
+        try:
+            self._import_species_list(dump)
+            self._import_documents(dump, "pokemon-species", self._get_species_urls,
+                                   self._catalog.save_species_documents)
+            self._import_documents(dump, "pokemon", self._get_pokemon_urls, self._catalog.save_pokemon_documents,
+                                   extract_pokemon_document)
+            self._import_documents(dump, "generation", self._get_generation_urls)
+            self._import_documents(dump, "move", self._get_move_urls, self._catalog.save_move_documents)
+            self._import_documents(dump, "type", self._get_type_urls, self._catalog.save_type_documents)
+        finally:
+            dump.close()
+
+        self._logger.info("Imported {count} documents from {path}".format(count=self.count, path=path))
+        return self.count
+
+    def _import_species_list(self, dump):
+        index = dump.get_index("pokemon-species")
+        if index is not None:
+            self._save_responses([CachedResponse(PokeApi.API_POKEMON_SPECIES_URL_PREFIX, self._read_text(dump, index))])
+
+    def _import_documents(self, dump, endpoint, get_urls, save_documents=None, parse=json.loads):
+        documents = dump.get_documents(endpoint)
+        for start in range(0, len(documents), self.BATCH_SIZE):
+            responses = []
+
+            def read_documents():
+                for member in documents[start:start + self.BATCH_SIZE]:
+                    text = self._read_text(dump, member)
+                    document = parse(text)
+                    responses.extend(CachedResponse(url, text) for url in get_urls(document))
+                    yield document
+
+            # Documents are normalized as they are read, so only the raw text of one batch is held at once
+            if save_documents is not None:
+                save_documents(read_documents())
+            else:
+                list(read_documents())
+            self._save_responses(responses)
+
+    def _read_text(self, dump, member):
+        return self._to_absolute_urls(dump.read_text(member))
+
+    def _to_absolute_urls(self, text):
+        return text.replace('"' + DUMP_API_PATH, '"' + API_BASE_URL)
+
+    def _get_species_urls(self, species):
+        prefix = PokeApi.API_POKEMON_SPECIES_URL_PREFIX
+        return [prefix + species["name"], prefix + str(species["id"])]
+
+    def _get_pokemon_urls(self, pokemon):
+        return [PokeApi.API_POKEMON_URL_PREFIX + "{}/".format(pokemon["id"])]
+
+    def _get_generation_urls(self, generation):
+        prefix = PokeApi.API_GENERATION_URL_PREFIX
+        return [prefix + generation["name"], prefix + str(generation["id"])]
+
+    def _get_move_urls(self, move):
+        return [PokeApi.API_MOVE_URL_PREFIX + "{}/".format(move["id"])]
+
+    def _get_type_urls(self, pokemon_type):
+        prefix = PokeApi.API_TYPE_URL_PREFIX
+        return [prefix + pokemon_type["name"], prefix + str(pokemon_type["id"])]
+
+    def _save_responses(self, responses):
+        self._database.save_responses(responses)
+        self.count += len(responses)
@@ -0,0 +1,215 @@
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import create_double_logger
+from pokeapidump import find_api_dirpath, DUMP_API_PATH, INDEX_FILENAME
+from pokemonwikiapi import Sqlite3, API_BASE_URL
+
+DEFAULT_LIMIT = 20
+NOT_FOUND_TEXT = "Not Found"
+SERVER_ERROR_TEXT = "Internal Server Error"
+
+
+class PokeApiStandIn:
+    '''
+    Serves recorded PokeAPI documents over HTTP on localhost, so PokeApi can be exercised without pokeapi.co
+    Fixtures are laid out like the PokeAPI static data dump, either a clone of api-data or recorded from the cache
+    Every response is delayed by latency seconds and error_rate of them fail with 500
+    '''
+
+    def __init__(self, fixture_dirpath, latency=0.0, error_rate=0.0, seed=0, host="127.0.0.1", port=0):
+        self._logger = create_double_logger(__name__)
+        self._api_dirpath = find_api_dirpath(fixture_dirpath)
+        self._names = self._index_names()
+        self.latency = latency
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.error_count = 0
+        self._server = ThreadingHTTPServer((host, port), self._create_handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return "http://{host}:{port}{path}".format(host=host, port=port, path=DUMP_API_PATH)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self._logger.debug("Serving {dirpath} at {url}".format(dirpath=self._api_dirpath, url=self.base_url))
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _index_names(self):
+        '''
+        The dump only has directories named by id, documents are looked up by name as well
+        :return: {resource: {name: id}}
+        '''
+        names = {}
+        for resource in os.scandir(self._api_dirpath):
+            filepath = os.path.join(resource.path, INDEX_FILENAME)
+            if resource.is_dir() and os.path.isfile(filepath):
+                with open(filepath, "r", encoding="utf-8") as file:
+                    results = json.load(file).get("results", [])
+                names[resource.name] = {r["name"]: r["url"].rstrip("/").rsplit("/", 1)[-1] for r in results}
+        return names
+
+    def _create_handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, text = stand_in.respond(self.path)
+                body = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                stand_in._logger.debug(format % args)
+
+        return Handler
+
+    def respond(self, path):
+        '''
+        :return: (status, body) for the requested path, after the injected latency
+        '''
+        time.sleep(self.latency)
+        with self._lock:
+            self.request_count += 1
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.error_count += 1
+
+        if failed:
+            return 500, SERVER_ERROR_TEXT
+
+        url = urllib.parse.urlsplit(path)
+        if not url.path.startswith(DUMP_API_PATH):
+            return 404, NOT_FOUND_TEXT
+
+        parts = [p for p in url.path[len(DUMP_API_PATH):].split("/") if p != ""]
+        if any(p in (".", "..") for p in parts):
+            return 404, NOT_FOUND_TEXT
+        if len(parts) == 1:
+            return self._respond_list(parts[0], urllib.parse.parse_qs(url.query))
+        if len(parts) == 2:
+            return self._respond_document(*parts)
+        return 404, NOT_FOUND_TEXT
+
+    def _respond_list(self, resource, query):
+        try:
+            document = self._load_document(resource)
+            limit = int(query.get("limit", [DEFAULT_LIMIT])[0])
+            offset = int(query.get("offset", [0])[0])
+        except (OSError, ValueError):
+            return 404, NOT_FOUND_TEXT
+
+        document["results"] = document.get("results", [])[offset:offset + limit]
+        return 200, self._to_base_url(json.dumps(document))
+
+    def _respond_document(self, resource, name):
+        key = self._names.get(resource, {}).get(name, name)
+        try:
+            return 200, self._to_base_url(json.dumps(self._load_document(resource, key)))
+        except (OSError, ValueError):
+            return 404, NOT_FOUND_TEXT
+
+    def _load_document(self, *path):
+        with open(os.path.join(self._api_dirpath, *path, INDEX_FILENAME), "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def _to_base_url(self, text):
+        return text.replace('"' + DUMP_API_PATH, '"' + self.base_url)
+
+
+def record_fixtures(database, dirpath, base_url=API_BASE_URL):
+    '''
+    Writes the responses cached from PokeAPI into dirpath laid out like the static data dump
+    Paginated lists are recorded once, from the longest cached page, responses that are not JSON are skipped
+    :return: number of written documents
+    '''
+    logger = create_double_logger(__name__)
+    documents = {}
+    for response in database.load_responses(base_url):
+        url = urllib.parse.urlsplit(response.url)
+        path = url.path[len(urllib.parse.urlsplit(base_url).path):].strip("/")
+        try:
+            document = json.loads(response.text.replace('"' + base_url, '"' + DUMP_API_PATH))
+        except json.JSONDecodeError:
+            # Caches written before Not Found stopped being cached still hold its text
+            logger.info("Skipped {url}, it is not a document".format(url=response.url))
+            continue
+        if path in documents and len(documents[path].get("results", [])) >= len(document.get("results", [])):
+            continue
+        documents[path] = document
+
+    for path, document in documents.items():
+        os.makedirs(os.path.join(dirpath, path), exist_ok=True)
+        with open(os.path.join(dirpath, path, INDEX_FILENAME), "w", encoding="utf-8") as file:
+            json.dump(document, file)
+    return len(documents)
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(description="Serve recorded PokeAPI documents on localhost")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Serve a fixture directory")
+    serve_parser.add_argument("dirpath", help="Fixture directory laid out like PokeAPI api-data")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--latency", type=float, default=0.0, help="Seconds to delay every response")
+    serve_parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of responses failing with 500")
+    serve_parser.add_argument("--seed", type=int, default=0, help="Seed of injected errors")
+
+    record_parser = subparsers.add_parser("record", help="Record cached PokeAPI responses as fixtures")
+    record_parser.add_argument("dirpath", help="Directory to write fixtures to")
+    return parser
+
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+    logging.getLogger().setLevel(logging.INFO)
+    logger = create_double_logger(__name__)
+
+    if args.command == "record":
+        count = record_fixtures(Sqlite3("pokeapi"), args.dirpath)
+        logger.info("Recorded {count} documents to {dirpath}".format(count=count, dirpath=args.dirpath))
+        return 0
+
+    stand_in = PokeApiStandIn(args.dirpath, args.latency, args.error_rate, args.seed, port=args.port)
+    logger.info("Serving at {url}, set POKEAPI_BASE_URL to use it".format(url=stand_in.base_url))
+    try:
+        stand_in.serve_forever()
+    except KeyboardInterrupt:
+        stand_in.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,54 +1,182 @@
 import logging
 import random
+import struct
 from abc import ABC, abstractmethod
 
 from common import load_json_file, resource_path, to_lowercase
+from movesetgenerator import MOVESET_SIZE, has_move_metadata, select_coverage_moveset
 from exceptions import PokemonGenderlessException, PokemonCreationFailedException, MovesNotEnoughExistException, \
-    InvalidPokemonLevelException, InvalidPokemonNameException, PokemonSpeciesNotExistException
-from pokemonwikiapi import ApiRequestFailedException
+    InvalidPokemonLevelException, InvalidPokemonNameException, PokemonSpeciesNotExistException, \
+    ApiRequestFailedException
 
 DEFAULT_POKEMON_FILEPATH = "defaults/pokemon.json"
-MOVESET_SIZE = 4
+TEAM_SIZE = 6
 MAX_LEVEL = 100
 MIN_LEVEL = 1
 COBBLEMON_PREFIX = "cobblemon:"
+GENDERS = ["MALE", "FEMALE"]
+NATURES = [
+    "hardy", "lonely", "brave", "adamant", "naughty",
+    "bold", "docile", "relaxed", "impish", "lax",
+    "timid", "hasty", "serious", "jolly", "naive",
+    "modest", "mild", "quiet", "bashful", "rash",
+    "calm", "gentle", "sassy", "careful", "quirky"
+]
+IV_STATS = ["hp", "attack", "defence", "special_attack", "special_defence", "speed"]
+MIN_IV_VALUE = 0
+MAX_IV_VALUE = 31
 
 
 class PokemonFactory(ABC):
     @abstractmethod
-    def create(self, name):
+    def create(self, name, level=None):
         raise NotImplementedError
 
 
 class RandomizedPokemonFactory(PokemonFactory):
-    def __init__(self, api):
+    def __init__(self, api, rng=random):
+        '''
+        :param rng: random.Random to draw from, a seeded instance makes created Pokemons reproducible
+        '''
         self._logger = logging.getLogger(__name__)
         self._api = api
+        self._random = rng
         self._default = load_json_file(resource_path(DEFAULT_POKEMON_FILEPATH))
 
-    def create(self, name):
+    def get_default_level(self):
+        return self._default["level"]
+
+    def create_team(self, names, levels=None):
+        return self.create_many(names, levels)
+
+    def create(self, name, level=None):
+        '''
+        :param level: level of the Pokemon, its moveset is drawn from the moves learned up to it
+        '''
         try:
             self._assert_valid_pokemon_name(name)
-            return self._create_pokemon(to_lowercase(name))
+            return self._create_pokemon(to_lowercase(name), self._create_level(level))
         except InvalidPokemonNameException as e:
             raise PokemonCreationFailedException(e.message)
         except PokemonSpeciesNotExistException:
             raise PokemonCreationFailedException("Pokemon {} does not exist".format(name.capitalize()))
 
+    def create_many(self, names, levels=None):
+        '''
+        Same distributions as create, but each random attribute is drawn for the whole batch in a single call
+        '''
+        names = [to_lowercase(n) for n in names]
+        levels = [self._create_level(l) for l in levels] if levels is not None else [self._create_level()] * len(names)
+        for name in names:
+            try:
+                self._assert_valid_pokemon_name(name)
+            except InvalidPokemonNameException as e:
+                raise PokemonCreationFailedException(e.message)
+
+        self._api.prefetch(list(dict.fromkeys(names)))
+        pokemons = [self._create_pokemon_without_random_attributes(n, l) for n, l in zip(names, levels)]
+        self._draw_random_attributes(pokemons)
+        return [p for p, _, _, _ in pokemons]
+
+    def _create_pokemon_without_random_attributes(self, name, level):
+        try:
+            pokemon = {
+                "species": self._create_species(name),
+                "gender": self._create_gender_without_random(name),
+                "level": level,
+                "nature": None,
+                "ability": self._default["ability"],
+                "moveset": self._default["moveset"],
+                "ivs": None,
+                "evs": self._create_evs(),
+                "shiny": self._create_shiny(),
+                "heldItem": self._create_held_item()
+            }
+            return (pokemon, self._get_abilities_or_none(name), self._get_moves_or_none(name, level),
+                    self._get_types_or_none(name))
+        except PokemonSpeciesNotExistException:
+            raise PokemonCreationFailedException("Pokemon {} does not exist".format(name.capitalize()))
+
+    def _create_gender_without_random(self, name):
+        try:
+            self._assert_not_pokemon_genderless(name)
+            return None
+        except PokemonGenderlessException:
+            return "GENDERLESS"
+        except ApiRequestFailedException as e:
+            self._logger.info(e.message)
+            return self._default["gender"]
+
+    def _get_abilities_or_none(self, name):
+        try:
+            return self._api.get_pokemon_abilities(name)
+        except ApiRequestFailedException as e:
+            self._logger.info(e.message)
+            return None
+
+    def _get_moves_or_none(self, name, level):
+        try:
+            return self._api.get_pokemon_move_details_at_level(name, level)
+        except ApiRequestFailedException as e:
+            self._logger.info(e.message)
+            return None
+
+    def _get_types_or_none(self, name):
+        try:
+            return self._api.get_pokemon_types(name)
+        except ApiRequestFailedException as e:
+            self._logger.info(e.message)
+            return None
+
+    def _draw_random_attributes(self, pokemons):
+        count = len(pokemons)
+        genders = self._random.randbytes(count)
+        ivs = self._random.randbytes(count * len(IV_STATS))
+        natures = draw_random_indices([len(NATURES)] * count, self._random)
+        abilities = iter(draw_random_indices([len(a) for _, a, _, _ in pokemons if a], self._random))
+        # Movesets scored for coverage draw from the generator themselves, after the batch
+        movesets = iter(draw_random_indices([len(m) - i for _, _, m, t in pokemons
+                                             if m and len(m) >= MOVESET_SIZE and not is_scorable(m, t)
+                                             for i in range(MOVESET_SIZE)], self._random))
+
+        for i, (pokemon, ability_names, moves, types) in enumerate(pokemons):
+            if pokemon["gender"] is None:
+                pokemon["gender"] = GENDERS[genders[i] & 1]
+            pokemon["nature"] = COBBLEMON_PREFIX + NATURES[natures[i]]
+            # A byte masked to 5 bits is uniform over 0-31, the range of an IV
+            pokemon["ivs"] = {stat: ivs[i * len(IV_STATS) + j] & MAX_IV_VALUE for j, stat in enumerate(IV_STATS)}
+            if ability_names:
+                pokemon["ability"] = ability_names[next(abilities)]
+            if moves and is_scorable(moves, types):
+                pokemon["moveset"] = select_coverage_moveset(moves, types, self._random)
+            elif moves:
+                pokemon["moveset"] = self._select_moveset_from_indices([m.name for m in moves], movesets)
+
+    def _select_moveset_from_indices(self, moves, indices):
+        if len(moves) < MOVESET_SIZE:
+            return moves
+
+        # Partial Fisher-Yates shuffle, the same distribution as random.sample
+        pool = list(moves)
+        for i in range(MOVESET_SIZE):
+            j = i + next(indices)
+            pool[i], pool[j] = pool[j], pool[i]
+        return pool[:MOVESET_SIZE]
+
     def _assert_valid_pokemon_name(self, name):
         if name == "":
             raise InvalidPokemonNameException("Pokemon's name cannot be empty string")
         if name.isdigit():
             raise InvalidPokemonNameException("Pokemon's name cannot be number string")
 
-    def _create_pokemon(self, name):
+    def _create_pokemon(self, name, level):
         return {
             "species": self._create_species(name),
             "gender": self._create_gender(name),
-            "level": self._create_level(),
+            "level": level,
             "nature": self._create_nature(),
             "ability": self._create_ability(name),
-            "moveset": self._create_moveset(name),
+            "moveset": self._create_moveset(name, level),
             "ivs": self._create_ivs(),
             "evs": self._create_evs(),
             "shiny": self._create_shiny(),
@@ -66,7 +194,7 @@ class RandomizedPokemonFactory(PokemonFactory):
     def _create_gender(self, name):
         try:
             self._assert_not_pokemon_genderless(name)
-            return random.choice(["MALE", "FEMALE"])
+            return self._random.choice(GENDERS)
         except PokemonGenderlessException:
             return "GENDERLESS"
         except ApiRequestFailedException as e:
@@ -77,39 +205,31 @@ class RandomizedPokemonFactory(PokemonFactory):
         if self._api.is_pokemon_genderless(name):
             raise PokemonGenderlessException
 
-    def _create_level(self):
-        return self._default["level"]
+    def _create_level(self, level=None):
+        return level if level is not None else self._default["level"]
 
     def _create_nature(self):
-        return select_random_nature()
+        return select_random_nature(self._random)
 
     def _create_ability(self, name):
         try:
             abilities = self._api.get_pokemon_abilities(name)
-            return random.choice(abilities)
+            return self._random.choice(abilities)
         except ApiRequestFailedException as e:
             self._logger.info(e.message)
             return self._default["ability"]
 
     def _create_ivs(self):
-        return {
-            "hp": self._create_random_iv_value(),
-            "attack": self._create_random_iv_value(),
-            "defence": self._create_random_iv_value(),
-            "special_attack": self._create_random_iv_value(),
-            "special_defence": self._create_random_iv_value(),
-            "speed": self._create_random_iv_value(),
-        }
+        return {stat: self._create_random_iv_value() for stat in IV_STATS}
 
     def _create_random_iv_value(self):
-        MIN_IV_VALUE = 0
-        MAX_IV_VALUE = 31
-        return random.randint(MIN_IV_VALUE, MAX_IV_VALUE)
+        return self._random.randint(MIN_IV_VALUE, MAX_IV_VALUE)
 
-    def _create_moveset(self, name):
+    def _create_moveset(self, name, level):
         try:
-            moves = self._api.get_pokemon_moves(name)
-            return select_random_moveset(moves)
+            moves = self._api.get_pokemon_move_details_at_level(name, level)
+            types = self._api.get_pokemon_types(name)
+            return select_moveset(moves, types, self._random) if moves else self._default["moveset"]
         except ApiRequestFailedException as e:
             self._logger.info(e.message)
             return self._default["moveset"]
@@ -124,15 +244,18 @@ class RandomizedPokemonFactory(PokemonFactory):
         return self._default["heldItem"]
 
 
-def select_random_nature():
-    NATURES = [
-        "hardy", "lonely", "brave", "adamant", "naughty",
-        "bold", "docile", "relaxed", "impish", "lax",
-        "timid", "hasty", "serious", "jolly", "naive",
-        "modest", "mild", "quiet", "bashful", "rash",
-        "calm", "gentle", "sassy", "careful", "quirky"
-    ]
-    return COBBLEMON_PREFIX + random.choice(NATURES)
+def select_random_nature(rng=random):
+    return COBBLEMON_PREFIX + rng.choice(NATURES)
+
+
+def draw_random_indices(sizes, rng=random):
+    '''
+    Draws a uniform index below each of sizes from a single call to the generator
+    Each index is the high 64 bits of a 64-bit random number times its size, which is biased by at most size / 2^64
+    The bytes are read little-endian whatever the host, so a seed picks the same indices everywhere
+    '''
+    numbers = struct.unpack("<{}Q".format(len(sizes)), rng.randbytes(8 * len(sizes)))
+    return [(n * size) >> 64 for n, size in zip(numbers, sizes)]
 
 
 def assert_valid_pokemon_level(level):
@@ -140,18 +263,33 @@ def assert_valid_pokemon_level(level):
         raise InvalidPokemonLevelException
 
 
-def get_random_pokemon_level():
-    return random.randint(MIN_LEVEL, MAX_LEVEL)
+def get_random_pokemon_level(rng=random):
+    return rng.randint(MIN_LEVEL, MAX_LEVEL)
 
 
 def get_pokemon_name(pokemon):
     return pokemon["species"].replace(COBBLEMON_PREFIX, "")
 
 
-def select_random_moveset(moves):
+def is_scorable(moves, types):
+    return types is not None and has_move_metadata(moves)
+
+
+def select_moveset(moves, types, rng=random):
+    '''
+    Scores movesets for coverage once every move's metadata is cached, draws them at random until then
+    :param moves: Moves the Pokemon can know
+    :param types: the Pokemon's types
+    '''
+    if is_scorable(moves, types):
+        return select_coverage_moveset(moves, types, rng)
+    return select_random_moveset([m.name for m in moves], rng)
+
+
+def select_random_moveset(moves, rng=random):
     try:
         _assert_exist_enough_moves(moves)
-        return random.sample(moves, MOVESET_SIZE)
+        return rng.sample(moves, MOVESET_SIZE)
     except MovesNotEnoughExistException as e:
         return e.moves
 
@@ -0,0 +1,84 @@
+import queue
+import random
+import threading
+
+from common import create_double_logger
+from exceptions import PokemonCreationFailedException, ApiRequestFailedException
+from metrics import METRICS
+from pokemonfactory import RandomizedPokemonFactory
+
+POOL_CAPACITY = 3
+# Offline or failing requests are retried this long after, rather than in a busy loop
+RETRY_SECONDS = 5
+# How often a worker waiting for room in the pool checks whether it was stopped
+POLL_SECONDS = 0.2
+
+
+class RandomPokemonPool:
+    '''
+    Creates random Pokemons ahead of time in a background thread, so taking one never waits on PokeAPI
+    At most capacity of them are kept, the worker creates the next one whenever one is taken
+    '''
+
+    def __init__(self, create_api, capacity=POOL_CAPACITY, rng=None):
+        '''
+        :param create_api: called once in the worker thread, so that not even importing the client holds up the menus
+        '''
+        self._logger = create_double_logger(__name__)
+        self._create_api = create_api
+        self._random = rng if rng is not None else random.Random()
+        self._queue = queue.Queue(maxsize=capacity)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        '''
+        Waits up to timeout seconds for a Pokemon being created to be finished, the worker exits after it
+        '''
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def pop(self):
+        '''
+        :return: a pooled Pokemon, or None while the pool is empty
+        '''
+        try:
+            pokemon = self._queue.get_nowait()
+            METRICS.increment("pool.hit")
+            return pokemon
+        except queue.Empty:
+            METRICS.increment("pool.miss")
+            return None
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def _fill(self):
+        api = self._create_api()
+        factory = RandomizedPokemonFactory(api, self._random)
+        while not self._stop_event.is_set():
+            try:
+                pokemon = factory.create(api.get_random_pokemon_name(self._random))
+            except (PokemonCreationFailedException, ApiRequestFailedException) as e:
+                self._logger.debug("Failed to create a pooled Pokemon: {reason}".format(reason=e.message))
+                self._stop_event.wait(RETRY_SECONDS)
+                continue
+            self._put(pokemon)
+
+    def _put(self, pokemon):
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(pokemon, timeout=POLL_SECONDS)
+                return
+            except queue.Full:
+                pass
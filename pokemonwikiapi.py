@@ -1,14 +1,44 @@
+import atexit
 import json
+import os
+import pathlib
 import random
 import sqlite3
+import threading
 import urllib.parse
+import zlib
 from abc import ABC, abstractmethod
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from json import JSONDecodeError
 
 import requests
 
-from common import create_double_logger, CooldownTimer
-from exceptions import ApiRequestFailedException, CachedResponseNotExistException, GenerationIxPokemonException
+from common import create_double_logger, LruCache, SingleFlight, TokenBucket, load_json_file, resource_path
+from exceptions import ApiRequestFailedException, CachedResponseNotExistException, LruCacheMissException, \
+    CachedSpeciesNotExistException, EligibleSpeciesIndexNotExistException
+from jsonstream import iter_fields
+from metrics import METRICS
+from typechart import TYPE_NAMES
+
+ELIGIBLE_SPECIES_FILEPATH = "defaults/species.json"
+# Cached responses are keyed by url, so pointing at a stand-in server also keeps its responses apart
+API_BASE_URL = os.environ.get("POKEAPI_BASE_URL", "https://pokeapi.co/api/v2/")
+REQUESTS_PER_SECOND = 1
+SERVER_ERROR_STATUS = 500
+REQUEST_BURST = 1
+# Learnsets are indexed for this version group, pokemon missing from it fall back to the latest one they appear in
+LEARNSET_VERSION_GROUP = "scarlet-violet"
+LEVEL_UP_METHOD = "level-up"
+
+# Shared by every client in the process, otherwise each new PokeApi would start with a fresh allowance
+RATE_LIMITER = TokenBucket(REQUESTS_PER_SECOND, REQUEST_BURST)
+
+CachedResponse = namedtuple("CachedResponse", ["url", "text"])
+Species = namedtuple("Species", ["id", "name", "gender_rate", "generation", "pokemon_id"])
+# type is None until the move document is cached
+Move = namedtuple("Move", ["name", "type", "power", "accuracy", "damage_class"])
 
 
 class PokemonWikiApi(ABC):
@@ -29,129 +59,494 @@ class PokemonWikiApi(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def get_random_pokemon_name(self):
+    def get_pokemon_moves_at_level(self, name, level):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_pokemon_move_details_at_level(self, name, level):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_pokemon_types(self, name):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_random_pokemon_name(self, rng=random):
+        '''
+        :return: species name as PokeAPI spells it, hyphens included, so it can be looked up again
+        '''
+        raise NotImplementedError
+
+    @abstractmethod
+    def prefetch(self, names, levels=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_species_name(self, name):
+        '''
+        :param name: species as Cobblemon spells it, without hyphens, like the Pokemons of a team hold it
+        :return: species name as PokeAPI spells it, name itself when the species is not cached
+        '''
         raise NotImplementedError
 
 
 class PokeApi(PokemonWikiApi):
-    API_POKEMON_SPECIES_URL_PREFIX = "https://pokeapi.co/api/v2/pokemon-species/"
-    COOLDOWN_SECONDS = 1
+    API_POKEMON_SPECIES_URL_PREFIX = API_BASE_URL + "pokemon-species/"
+    API_POKEMON_URL_PREFIX = API_BASE_URL + "pokemon/"
+    API_GENERATION_URL_PREFIX = API_BASE_URL + "generation/"
+    API_MOVE_URL_PREFIX = API_BASE_URL + "move/"
+    API_TYPE_URL_PREFIX = API_BASE_URL + "type/"
+    MEMO_CAPACITY = 64
+    PREFETCH_WORKERS = 6
+
+    _rate_limiter = RATE_LIMITER
 
-    def __init__(self):
+    # Parsed documents are shared by every instance, commands construct a new PokeApi per action. They are keyed by
+    # the cache they were read into too, a document memoized for one cache file says nothing about another
+    _memo = LruCache(MEMO_CAPACITY)
+
+    # The menus, the random Pokemon pool and the cache warmer each have their own PokeApi, the first of them to
+    # request a url sends the request and the others asking for it meanwhile wait for its response
+    _in_flight = SingleFlight()
+
+    def __init__(self, base_url=API_BASE_URL, database=None, catalog=None, rate_limiter=None):
         self._logger = create_double_logger(__name__)
-        self._database = Sqlite3("pokeapi")
-        self._timer = CooldownTimer(self.COOLDOWN_SECONDS)
+        self._base_url = base_url
+        self._species_url_prefix = base_url + "pokemon-species/"
+        self._pokemon_url_prefix = base_url + "pokemon/"
+        self._generation_url_prefix = base_url + "generation/"
+        self._move_url_prefix = base_url + "move/"
+        self._type_url_prefix = base_url + "type/"
+        self._database = database if database is not None else Sqlite3("pokeapi")
+        self._memo_scope = self._database.get_location()
+        self._catalog = catalog if catalog is not None else NormalizedSqlite3()
+        if rate_limiter is not None:
+            self._rate_limiter = rate_limiter
+        self._eligibility = load_json_file(resource_path(ELIGIBLE_SPECIES_FILEPATH))
 
     def assert_exist_pokemon_species(self, name):
-        url = urllib.parse.urljoin(self.API_POKEMON_SPECIES_URL_PREFIX, name)
-        self._get_response(url)
+        self._get_species(name)
 
     def get_pokemon_abilities(self, name):
-        url = self._get_pokemon_url(name)
-        pokemon = self._get_response(url)
+        pokemon_id = self._get_pokemon_id(name)
+        return self._catalog.load_abilities(pokemon_id)
+
+    def _get_species(self, name):
+        try:
+            return self._catalog.load_species(name)
+        except CachedSpeciesNotExistException:
+            url = urllib.parse.urljoin(self._species_url_prefix, name)
+            return self._catalog.save_species(self._get_response(url))
 
-        return [self._get_ability_name(a) for a in pokemon["abilities"]]
+    def _get_pokemon_id(self, name):
+        pokemon_id = self._get_species(name).pokemon_id
+        if not self._catalog.exist_pokemon(pokemon_id):
+            url = self._get_pokemon_url(pokemon_id)
+            self._catalog.save_pokemon(self._get_response(url))
+        return pokemon_id
 
-    def _get_pokemon_url(self, name):
-        pokemon_species_url = urllib.parse.urljoin(self.API_POKEMON_SPECIES_URL_PREFIX, name)
-        pokemon_species = self._get_response(pokemon_species_url)
-        default_variety = self._get_default_variety(pokemon_species["varieties"])
-        return default_variety["pokemon"]["url"]
+    def _get_pokemon_url(self, pokemon_id):
+        return self._pokemon_url_prefix + "{}/".format(pokemon_id)
 
-    def _get_default_variety(self, varieties):
-        return next(filter(lambda v: v["is_default"], varieties))
+    def _get_move_url(self, move_id):
+        return self._move_url_prefix + "{}/".format(move_id)
+
+    def _get_endpoint(self, url):
+        return url[len(self._base_url):].split("/", 1)[0].split("?", 1)[0]
+
+    def _get_memo_key(self, url):
+        return self._memo_scope, url
 
     def _get_response(self, url):
         try:
-            return self._get_response_from_database(url)
+            response = self._memo.get(self._get_memo_key(url))
+            METRICS.increment("memo.hit." + self._get_endpoint(url))
+            return response
+        except LruCacheMissException:
+            METRICS.increment("memo.miss." + self._get_endpoint(url))
+            response = self._get_response_from_database_or_internet(url)
+            self._memo.put(self._get_memo_key(url), response)
+            return response
+
+    def _get_response_from_database_or_internet(self, url):
+        try:
+            response = self._get_response_from_database(url)
+            METRICS.increment("cache.hit." + self._get_endpoint(url))
+            return response
         except CachedResponseNotExistException:
+            METRICS.increment("cache.miss." + self._get_endpoint(url))
             return self._get_response_from_internet_and_save_to_database(url)
 
     def _get_response_from_database(self, url):
-        try:
-            return json.loads(self._database.load_response(url))
-        except JSONDecodeError:
-            raise ApiRequestFailedException("API request failed to {url}".format(url=url))
+        return self._parse_response(url, self._database.load_response(url))
 
     def _get_response_from_internet_and_save_to_database(self, url):
+        response = self._get_response_from_internet_within_rate_limit(url)
+        self._database.save_response(response)
+        return self._parse_response(url, response.text)
+
+    def _parse_response(self, url, text):
+        '''
+        Pokemon documents are mostly version group details of their moves, only the fields the catalog reads are
+        extracted from them, see extract_pokemon_document
+        '''
+        endpoint = self._get_endpoint(url)
         try:
-            response = self._get_response_from_internet_after_cooldown_elapsed(url)
-            self._database.save_response(response)
-            return response.json()
+            with METRICS.time("parse." + endpoint):
+                return extract_pokemon_document(text) if endpoint == "pokemon" else json.loads(text)
         except JSONDecodeError:
             raise ApiRequestFailedException("API request failed to {url}".format(url=url))
 
-    def _get_response_from_internet_after_cooldown_elapsed(self, url):
-        while not self._timer.is_elapsed_cooldown():
-            pass
+    def _get_response_from_internet_within_rate_limit(self, url):
+        return self._in_flight.run(url, self._wait_and_get_response_from_internet, url)
 
-        response = self._get_response_from_internet(url)
-        self._timer.reset()
-        return response
+    def _wait_and_get_response_from_internet(self, url):
+        with METRICS.time("rateLimit.wait"):
+            self._rate_limiter.acquire()
+        return self._get_response_from_internet(url)
 
     def _get_response_from_internet(self, url):
+        endpoint = self._get_endpoint(url)
         try:
-            return requests.get(url)
+            with METRICS.time("network." + endpoint):
+                response = requests.get(url)
         except requests.RequestException:
+            METRICS.increment("network.error." + endpoint)
             raise ApiRequestFailedException("API request failed to {url}".format(url=url))
 
-    def _get_ability_name(self, ability):
-        return ability["ability"]["name"].replace("-", "")
-
-    def is_pokemon_genderless(self, name):
-        url = urllib.parse.urljoin(self.API_POKEMON_SPECIES_URL_PREFIX, name)
-        pokemon = self._get_response(url)
-        return pokemon["gender_rate"] == -1
+        # Only documents are cached, Not Found and server errors are asked for again on the next lookup
+        if not response.ok:
+            if response.status_code >= SERVER_ERROR_STATUS:
+                METRICS.increment("network.error." + endpoint)
+            raise ApiRequestFailedException("API request failed to {url}".format(url=url))
+        return response
 
-    def get_pokemon_moves(self, name):
-        url = self._get_pokemon_url(name)
-        pokemon = self._get_response(url)
-        return self._get_move_names(pokemon["moves"])
+    def prefetch(self, names, levels=None):
+        '''
+        :param levels: levels of the Pokemons named, given for batches so that the moves they learn by leveling up
+        to them are fetched too, interactive lookups leave moves to the cache warmer rather than wait on them
+        '''
+        missing_names = [n for n in names if not self._catalog.exist_species(n)]
+        species_urls = [urllib.parse.urljoin(self._species_url_prefix, n) for n in missing_names]
+        self._catalog.save_species_documents(self._prefetch_responses(species_urls))
 
-    def _get_move_names(self, moves):
-        move_names = []
-        for m in moves:
-            move_name = m["move"]["name"]
-            without_hyphen = move_name.replace("-", "")
-            move_names.append(without_hyphen)
-        return move_names
+        pokemon_ids = [s.pokemon_id for s in self._load_cached_species(names)]
+        missing_ids = [i for i in pokemon_ids if not self._catalog.exist_pokemon(i)]
+        pokemon_urls = [self._get_pokemon_url(i) for i in missing_ids]
+        self._catalog.save_pokemon_documents(self._prefetch_responses(pokemon_urls))
 
-    def get_random_pokemon_name(self):
-        return self._get_random_pokemon_name_except_generation_ix()
+        if levels is not None:
+            self.prefetch_moves(self._catalog.load_missing_level_up_move_ids(self._get_pokemon_levels(names, levels)))
 
-    def _get_random_pokemon_name_except_generation_ix(self):
+    def _get_pokemon_levels(self, names, levels):
         '''
-        Cobblemon does not have Pokemons introduced in The Indigo Disc DLC
-        PokeAPI does not provide any means to distinguish non-DLC Gen.9 Pokemons
-        :return:
+        :return: {pokemon_id: highest level} of the cached pokemons among names
         '''
-        while True:
+        pokemon_levels = {}
+        for name, level in zip(names, levels):
             try:
-                index = self._get_random_pokemon_index()
-                url = urllib.parse.urljoin(self.API_POKEMON_SPECIES_URL_PREFIX, str(index))
-                pokemon = self._get_response(url)
-                name = pokemon["name"]
-                self._assert_not_generation_ix(name)
-                return name.replace("-", "")
-            except GenerationIxPokemonException:
+                species = self._catalog.load_species(name)
+            except CachedSpeciesNotExistException:
+                continue
+            if self._catalog.exist_pokemon(species.pokemon_id):
+                pokemon_levels[species.pokemon_id] = max(level, pokemon_levels.get(species.pokemon_id, level))
+        return pokemon_levels
+
+    def prefetch_moves(self, move_ids=None):
+        '''
+        Caches move documents within the rate limit, by default of every move in cached learnsets not cached yet
+        :return: number of cached moves
+        '''
+        if move_ids is None:
+            move_ids = self._catalog.load_missing_move_ids()
+        documents = self._prefetch_responses([self._get_move_url(i) for i in move_ids])
+        self._catalog.save_move_documents(documents)
+        return len(documents)
+
+    def get_missing_move_ids(self):
+        return self._catalog.load_missing_move_ids()
+
+    def _load_cached_species(self, names):
+        species = []
+        for name in names:
+            try:
+                species.append(self._catalog.load_species(name))
+            except CachedSpeciesNotExistException:
                 pass
+        return species
+
+    def _prefetch_responses(self, urls):
+        unique_urls = list(dict.fromkeys(urls))
+        missing_urls = list(filter(self._is_not_exist_cached_response, unique_urls))
+        failed_urls = self._fetch_and_save_to_database(missing_urls)
+
+        parsed = []
+        for url in unique_urls:
+            if url in failed_urls:
+                continue
+            try:
+                parsed.append(self._get_response(url))
+            except ApiRequestFailedException as e:
+                self._logger.debug(e.message)
+        return parsed
+
+    def _is_not_exist_cached_response(self, url):
+        if self._get_memo_key(url) in self._memo:
+            return False
+
+        try:
+            self._database.load_response(url)
+            return False
+        except CachedResponseNotExistException:
+            return True
+
+    def _fetch_and_save_to_database(self, urls):
+        '''
+        :return: urls that could not be fetched, so they are not requested again right away
+        '''
+        if len(urls) == 0:
+            return set()
+
+        with ThreadPoolExecutor(max_workers=self.PREFETCH_WORKERS) as executor:
+            results = list(executor.map(self._get_response_from_internet_or_none, urls))
+
+        responses = [r for r in results if r is not None]
+        self._database.save_responses(responses)
+        self._logger.debug("Prefetched {count} responses".format(count=len(responses)))
+        return {u for u, r in zip(urls, results) if r is None}
+
+    def _get_response_from_internet_or_none(self, url):
+        try:
+            return self._get_response_from_internet_within_rate_limit(url)
+        except ApiRequestFailedException as e:
+            self._logger.debug(e.message)
+            return None
+
+    def get_species_name(self, name):
+        try:
+            return self._catalog.load_species_name(name)
+        except CachedSpeciesNotExistException:
+            return name
+
+    def is_pokemon_cached(self, name):
+        try:
+            species = self._catalog.load_species(name)
+        except CachedSpeciesNotExistException:
+            return False
+        return self._catalog.exist_pokemon(species.pokemon_id)
+
+    def get_species_names(self):
+        return [r["name"] for r in self._get_species_list()["results"]]
+
+    def get_generation_species_names(self, generation):
+        return [s["name"] for s in self._get_generation(generation)["pokemon_species"]]
+
+    def get_memo_statistics(self):
+        return {
+            "size": len(self._memo),
+            "hits": self._memo.hits,
+            "misses": self._memo.misses
+        }
+
+    def is_pokemon_genderless(self, name):
+        return self._get_species(name).gender_rate == -1
+
+    def get_pokemon_moves(self, name):
+        pokemon_id = self._get_pokemon_id(name)
+        return self._catalog.load_moves(pokemon_id)
+
+    def get_pokemon_moves_at_level(self, name, level):
+        pokemon_id = self._get_pokemon_id(name)
+        return self._catalog.load_moves_at_level(pokemon_id, level)
+
+    def get_pokemon_move_details_at_level(self, name, level):
+        pokemon_id = self._get_pokemon_id(name)
+        return self._catalog.load_move_details_at_level(pokemon_id, level)
 
-    def _get_random_pokemon_index(self):
-        count = self._get_maximum_pokemon_count()
-        return random.randint(1, count)
+    def get_pokemon_types(self, name):
+        pokemon_id = self._get_pokemon_id(name)
+        return self._catalog.load_types(pokemon_id)
 
-    def _get_maximum_pokemon_count(self):
-        response = self._get_response(self.API_POKEMON_SPECIES_URL_PREFIX)
-        return response["count"]
+    def get_random_pokemon_name(self, rng=random):
+        count = self._get_eligible_species_count()
+        return self._catalog.load_eligible_species(rng.randint(1, count))
 
-    def _assert_not_generation_ix(self, name):
-        if self._get_pokemon_generation(name) == "generation-ix":
-            raise GenerationIxPokemonException
+    def get_eligible_pokemon_names(self):
+        self._get_eligible_species_count()
+        return self._catalog.load_eligible_species_names()
 
-    def _get_pokemon_generation(self, name):
-        url = urllib.parse.urljoin(self.API_POKEMON_SPECIES_URL_PREFIX, name)
-        response = self._get_response(url)
-        return response["generation"]["name"]
+    def get_eligible_pokemon_types(self):
+        '''
+        Read from the type documents, so all eligible species are covered by one request per type
+        :return: {name: types} of every eligible species
+        '''
+        self._get_eligible_species_count()
+        if not self._catalog.exist_type_index():
+            self._build_type_index()
+        return self._catalog.load_eligible_species_types()
+
+    def _build_type_index(self):
+        urls = [urllib.parse.urljoin(self._type_url_prefix, t) for t in TYPE_NAMES]
+        documents = self._prefetch_responses(urls)
+        if len(documents) < len(urls):
+            raise ApiRequestFailedException("API request failed to {url}".format(url=self._type_url_prefix))
+        self._catalog.save_type_documents(documents)
+
+    def _get_eligible_species_count(self):
+        try:
+            return self._catalog.load_eligible_species_count(self._eligibility)
+        except EligibleSpeciesIndexNotExistException:
+            self._build_eligible_species_index()
+            return self._catalog.load_eligible_species_count(self._eligibility)
+
+    def _build_eligible_species_index(self):
+        species_list = self._get_species_list()
+        excluded_generations = [self._get_generation(g) for g in self._eligibility["excludedGenerations"]]
+        eligible = select_eligible_species(species_list, excluded_generations, self._eligibility)
+        self._catalog.save_eligible_species(eligible, self._eligibility)
+        self._logger.debug("Indexed {count} eligible species".format(count=len(eligible)))
+
+    def _get_species_list(self):
+        species_list = self._get_response(self._species_url_prefix)
+        if len(species_list["results"]) < species_list["count"]:
+            url = self._species_url_prefix + "?limit={}".format(species_list["count"])
+            species_list = self._get_response(url)
+        return species_list
+
+    def _get_generation(self, name):
+        return self._get_response(urllib.parse.urljoin(self._generation_url_prefix, name))
+
+
+def select_eligible_species(species_list, excluded_generations, eligibility):
+    '''
+    Cobblemon does not have Pokemons introduced in The Indigo Disc DLC
+    PokeAPI does not provide any means to distinguish non-DLC Gen.9 Pokemons, so whole generations are excluded
+    and the allowlist brings back the ones Cobblemon does have
+    :return: list of (id, name) sorted by id
+    '''
+    excluded = set(s["name"] for g in excluded_generations for s in g["pokemon_species"])
+    allowlist = set(eligibility["allowlist"])
+    denylist = set(eligibility["denylist"])
+
+    eligible = []
+    for result in species_list["results"]:
+        name = result["name"]
+        if (name not in excluded or name in allowlist) and name not in denylist:
+            eligible.append((get_id_from_url(result["url"]), name))
+    return sorted(eligible)
+
+
+def get_default_variety(varieties):
+    return next(filter(lambda v: v["is_default"], varieties))
+
+
+def get_id_from_url(url):
+    return int(url.rstrip("/").rsplit("/", 1)[-1])
+
+
+def get_ability_name(ability):
+    return ability["ability"]["name"].replace("-", "")
+
+
+def get_move_names(moves):
+    move_names = []
+    for m in moves:
+        move_name = m["move"]["name"]
+        without_hyphen = move_name.replace("-", "")
+        move_names.append(without_hyphen)
+    return move_names
+
+
+def get_learnset(moves, version_group=LEARNSET_VERSION_GROUP):
+    '''
+    Pokemon missing from version_group, like the ones cut from Scarlet and Violet, take the latest version group
+    they have moves in, version groups are numbered in release order
+    :return: list of (move, method, level, move id) learned in that version group
+    '''
+    details = [(m["move"], d) for m in moves for d in m.get("version_group_details", [])]
+    version_groups = {d["version_group"]["name"]: get_id_from_url(d["version_group"]["url"]) for _, d in details}
+    if version_group not in version_groups and len(version_groups) > 0:
+        version_group = max(version_groups, key=version_groups.get)
+
+    learnset = [(move["name"].replace("-", ""), d["move_learn_method"]["name"], d["level_learned_at"],
+                 get_id_from_url(move["url"])) for move, d in details if d["version_group"]["name"] == version_group]
+    return list(dict.fromkeys(learnset))
+
+
+def extract_pokemon_document(text, version_group=LEARNSET_VERSION_GROUP):
+    '''
+    Decodes a pokemon document one move at a time and keeps only what NormalizedSqlite3 reads from it,
+    so the hundreds of version group details of a Pokemon like Mew never exist as a single object tree
+    :return: the document with only id, name, abilities, types and moves, shaped like PokeAPI's,
+    moves hold the details of the version group get_learnset picks and no other
+    '''
+    document = {"abilities": [], "types": [], "moves": []}
+    details_filter = VersionGroupDetailsFilter(version_group)
+    for key, value in iter_fields(text, {"id", "name", "abilities", "types"}, {"moves"}):
+        if key == "moves":
+            document["moves"].append(details_filter.extract_move(value))
+        elif key == "abilities":
+            document["abilities"] = [{"ability": {"name": a["ability"]["name"]}} for a in value]
+        elif key == "types":
+            document["types"] = [{"slot": t["slot"], "type": {"name": t["type"]["name"]}} for t in value]
+        else:
+            document[key] = value
+    details_filter.keep_learnset_only(document["moves"])
+    return document
+
+
+class VersionGroupDetailsFilter:
+    '''
+    Keeps the version group details get_learnset can still pick while moves are read one at a time: those of
+    version_group and, until it shows up, those of the latest version group so far, so the kept details grow with
+    the number of moves rather than with moves times version groups
+    Only the level, learn method and version group of a detail are kept, the last two shared between moves
+    '''
+
+    def __init__(self, version_group):
+        self._version_group = version_group
+        self._has_version_group = False
+        self._latest_id = None
+        self._latest_name = None
+        self._shared = {}
+
+    def extract_move(self, move):
+        details = [self._extract_detail(d) for d in move.get("version_group_details", []) if self._is_kept(d)]
+        return {"move": {"name": move["move"]["name"], "url": move["move"]["url"]}, "version_group_details": details}
+
+    def _is_kept(self, detail):
+        name = detail["version_group"]["name"]
+        if name == self._version_group:
+            self._has_version_group = True
+            return True
+        if self._has_version_group:
+            return False
+
+        version_group_id = get_id_from_url(detail["version_group"]["url"])
+        if self._latest_id is not None and version_group_id < self._latest_id:
+            return False
+        self._latest_id = version_group_id
+        self._latest_name = name
+        return True
+
+    def _extract_detail(self, detail):
+        method = detail["move_learn_method"]["name"]
+        version_group = detail["version_group"]
+        return {
+            "level_learned_at": detail["level_learned_at"],
+            "move_learn_method": self._shared.setdefault(method, {"name": method}),
+            "version_group": self._shared.setdefault(version_group["url"], {"name": version_group["name"],
+                                                                            "url": version_group["url"]}),
+        }
+
+    def keep_learnset_only(self, moves):
+        '''
+        Drops the details kept for version groups that turned out not to be the one get_learnset picks
+        '''
+        version_group = self._version_group if self._has_version_group else self._latest_name
+        for move in moves:
+            move["version_group_details"] = [d for d in move["version_group_details"]
+                                             if d["version_group"]["name"] == version_group]
 
 
 class Database(ABC):
@@ -159,60 +554,467 @@ class Database(ABC):
     def save_response(self, request):
         raise NotImplementedError
 
+    @abstractmethod
+    def save_responses(self, responses):
+        raise NotImplementedError
+
     @abstractmethod
     def load_response(self, url):
         raise NotImplementedError
 
+    @abstractmethod
+    def get_location(self):
+        '''
+        :return: hashable value that is equal for databases storing their responses in the same place
+        '''
+        raise NotImplementedError
+
+
+class ConnectionManager:
+    '''
+    One connection per cache file for the whole process, shared by every Sqlite3 and worker thread
+    Writes accumulate in an open transaction that is committed every COMMIT_INTERVAL writes and at exit
+    '''
+    COMMIT_INTERVAL = 100
+    PRAGMAS = [
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -16000",
+    ]
+    READ_ONLY_PRAGMAS = [
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -16000",
+    ]
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, filepath):
+        key = os.path.abspath(filepath)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = ConnectionManager(filepath)
+            return cls._instances[key]
+
+    @classmethod
+    def open_read_only(cls, filepath):
+        '''
+        Replaces the connection of this process to filepath with a read-only one, writes to it are dropped
+        Worker processes use it so that they never contend with the parent process for the write lock
+        The schema must already have been prepared by a writable connection
+        '''
+        key = os.path.abspath(filepath)
+        with cls._instances_lock:
+            cls._instances[key] = ConnectionManager(filepath, read_only=True)
+            return cls._instances[key]
+
+    def __init__(self, filepath, read_only=False):
+        self._logger = create_double_logger(__name__)
+        self._key = os.path.abspath(filepath)
+        self._read_only = read_only
+        self._conn = self._connect(filepath)
+        self._lock = threading.RLock()
+        self._pending_writes = 0
+        self._transaction_depth = 0
+        self._prepared = set()
+
+        for pragma in self.READ_ONLY_PRAGMAS if read_only else self.PRAGMAS:
+            self._conn.execute(pragma)
+        atexit.register(self.close)
+
+    @property
+    def key(self):
+        return self._key
+
+    def _connect(self, filepath):
+        if self._read_only:
+            uri = pathlib.Path(os.path.abspath(filepath)).as_uri() + "?mode=ro"
+            return sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None)
+        return sqlite3.connect(filepath, check_same_thread=False, isolation_level=None)
+
+    def prepare_once(self, key, prepare):
+        with self._lock:
+            if key not in self._prepared and not self._read_only:
+                with self.transaction():
+                    prepare()
+            self._prepared.add(key)
+
+    def read(self, sql, parameters=()):
+        with self._lock, METRICS.time("db.read"):
+            return self._conn.execute(sql, parameters).fetchall()
+
+    def write(self, sql, parameters=()):
+        if self._read_only:
+            return
+
+        with self._lock:
+            self._begin_if_not_in_transaction()
+            with METRICS.time("db.write"):
+                self._conn.execute(sql, parameters)
+            self._count_write(1)
+
+    def write_many(self, sql, sequence_of_parameters):
+        if self._read_only:
+            return
+
+        with self._lock:
+            self._begin_if_not_in_transaction()
+            with METRICS.time("db.write"):
+                cursor = self._conn.executemany(sql, sequence_of_parameters)
+            self._count_write(max(cursor.rowcount, 1))
+
+    @contextmanager
+    def transaction(self):
+        '''
+        Groups every write inside into one transaction, committed when the outermost block exits
+        '''
+        with self._lock:
+            self._transaction_depth += 1
+            try:
+                yield
+            finally:
+                self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.flush()
+
+    def _begin_if_not_in_transaction(self):
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+
+    def _count_write(self, count):
+        self._pending_writes += count
+        if self._transaction_depth == 0 and self._pending_writes >= self.COMMIT_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._conn.in_transaction:
+                with METRICS.time("db.commit"):
+                    self._conn.execute("COMMIT")
+                self._logger.debug("Committed {count} writes".format(count=self._pending_writes))
+            self._pending_writes = 0
+
+    def close(self):
+        with self._instances_lock:
+            if self._instances.get(self._key) is self:
+                del self._instances[self._key]
+
+        with self._lock:
+            try:
+                self.flush()
+                self._conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+
 
 class Sqlite3(Database):
     DB_NAME = "pokemon.db"
+    FORMAT_TEXT = 0
+    FORMAT_ZLIB = 1
+    COMPRESSION_LEVEL = 6
 
-    def __init__(self, table):
+    def __init__(self, table, filepath=DB_NAME):
         self._table = table
-        self._conn = sqlite3.connect(self.DB_NAME)
-        self._create_table()
+        self._conn = ConnectionManager.get(filepath)
+        self._conn.prepare_once(table, self._create_table)
+
+    def get_location(self):
+        return self._conn.key, self._table
 
     def _create_table(self):
-        cursor = self._conn.cursor()
-        cursor.execute("CREATE TABLE IF NOT EXISTS {table} "
-                       "(url TEXT PRIMARY KEY, response TEXT)".format(table=self._table))
-        cursor.close()
+        self._conn.write("CREATE TABLE IF NOT EXISTS {table} "
+                         "(url TEXT PRIMARY KEY, response TEXT, format INTEGER NOT NULL DEFAULT 0)"
+                         .format(table=self._table))
+        self._add_format_column_if_not_exist()
+
+    def _add_format_column_if_not_exist(self):
+        '''
+        Caches created before compression have no format column, their rows stay readable as FORMAT_TEXT
+        '''
+        columns = [row[1] for row in self._conn.read("PRAGMA table_info({table})".format(table=self._table))]
+        if "format" not in columns:
+            self._conn.write("ALTER TABLE {table} ADD COLUMN format INTEGER NOT NULL DEFAULT 0"
+                             .format(table=self._table))
 
     def save_response(self, response):
-        try:
-            self._insert_row(response)
-        except sqlite3.IntegrityError:
-            self._update_row(response)
+        self.save_responses([response])
 
-    def _insert_row(self, response):
-        cursor = self._conn.cursor()
+    def save_responses(self, responses):
+        rows = [(r.url, self._compress(r.text), self.FORMAT_ZLIB) for r in responses]
+        with self._conn.transaction():
+            self._conn.write_many("INSERT OR REPLACE INTO {table} (url, response, format) VALUES (?, ?, ?)"
+                                  .format(table=self._table), rows)
 
-        cursor.execute("INSERT INTO {table} (url, response) VALUES (?, ?)"
-                       .format(table=self._table), (response.url, response.text))
-        self._conn.commit()
+    def _compress(self, text):
+        return zlib.compress(text.encode("utf-8"), self.COMPRESSION_LEVEL)
 
-        cursor.close()
+    def load_response(self, url):
+        result = self._conn.read("SELECT response, format FROM {table} WHERE url=?"
+                                 .format(table=self._table), (url,))
 
-    def _update_row(self, response):
-        cursor = self._conn.cursor()
+        if self._is_not_exist_result(result):
+            raise CachedResponseNotExistException
+        return self._decompress(*result[0])
 
-        cursor.execute("UPDATE {table} SET response = ? WHERE url = ?"
-                       .format(table=self._table), (response.url, response.text))
-        self._conn.commit()
+    def load_responses(self, url_prefix):
+        rows = self._conn.read("SELECT url, response, format FROM {table} WHERE url LIKE ? ORDER BY url"
+                               .format(table=self._table), (url_prefix + "%",))
+        return [CachedResponse(url, self._decompress(r, f)) for url, r, f in rows]
 
-        cursor.close()
+    def _decompress(self, response, response_format):
+        if response_format == self.FORMAT_ZLIB:
+            return zlib.decompress(response).decode("utf-8")
+        return response
 
-    def load_response(self, url):
-        cursor = self._conn.cursor()
+    def _is_not_exist_result(self, result):
+        return result is None or len(result) == 0
 
-        cursor.execute("SELECT response FROM {table} WHERE url=?".format(table=self._table), (url,))
-        result = cursor.fetchone()
 
-        cursor.close()
+class NormalizedSqlite3:
+    '''
+    Holds only the fields PokeApi answers from, extracted from the cached species and pokemon documents
+    The raw documents stay in Sqlite3, so these tables are dropped and rebuilt lazily whenever SCHEMA_VERSION changes
+    '''
+    DB_NAME = "pokemon.db"
+    SCHEMA_VERSION = 3
+    TABLES = ["species", "pokemon", "pokemon_ability", "pokemon_move", "pokemon_learnset", "pokemon_type", "move",
+              "eligible_species", "metadata"]
+
+    def __init__(self, filepath=DB_NAME):
+        self._conn = ConnectionManager.get(filepath)
+        self._conn.prepare_once(self.__class__.__name__, self._migrate_tables)
+
+    def _migrate_tables(self):
+        version = self._conn.read("PRAGMA user_version")[0][0]
+        if version != self.SCHEMA_VERSION:
+            for table in self.TABLES:
+                self._conn.write("DROP TABLE IF EXISTS {table}".format(table=table))
+            self._conn.write("PRAGMA user_version = {}".format(self.SCHEMA_VERSION))
+        self._create_tables()
+
+    def _create_tables(self):
+        self._conn.write("CREATE TABLE IF NOT EXISTS species "
+                         "(id INTEGER PRIMARY KEY, name TEXT UNIQUE, gender_rate INTEGER, "
+                         "generation TEXT, pokemon_id INTEGER)")
+        self._conn.write("CREATE TABLE IF NOT EXISTS pokemon (id INTEGER PRIMARY KEY, name TEXT)")
+        self._conn.write("CREATE TABLE IF NOT EXISTS pokemon_ability "
+                         "(pokemon_id INTEGER, ability TEXT, PRIMARY KEY (pokemon_id, ability)) WITHOUT ROWID")
+        self._conn.write("CREATE TABLE IF NOT EXISTS pokemon_move "
+                         "(pokemon_id INTEGER, move TEXT, PRIMARY KEY (pokemon_id, move)) WITHOUT ROWID")
+        # Keyed so that the moves a pokemon knows at a level are a single range of the primary key
+        self._conn.write("CREATE TABLE IF NOT EXISTS pokemon_learnset "
+                         "(pokemon_id INTEGER, method TEXT, level INTEGER, move TEXT, move_id INTEGER, "
+                         "PRIMARY KEY (pokemon_id, method, level, move)) WITHOUT ROWID")
+        self._conn.write("CREATE TABLE IF NOT EXISTS pokemon_type "
+                         "(pokemon_id INTEGER, slot INTEGER, type TEXT, PRIMARY KEY (pokemon_id, slot)) WITHOUT ROWID")
+        self._conn.write("CREATE TABLE IF NOT EXISTS move "
+                         "(id INTEGER PRIMARY KEY, name TEXT, type TEXT, power INTEGER, accuracy INTEGER, "
+                         "damage_class TEXT)")
+        self._conn.write("CREATE TABLE IF NOT EXISTS eligible_species "
+                         "(position INTEGER PRIMARY KEY, id INTEGER, name TEXT)")
+        self._conn.write("CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT)")
+
+    def save_species(self, document):
+        return self.save_species_documents([document])[0]
+
+    def save_species_documents(self, documents):
+        rows = [self._to_species(d) for d in documents]
+        with self._conn.transaction():
+            self._conn.write_many("INSERT OR REPLACE INTO species (id, name, gender_rate, generation, pokemon_id) "
+                                  "VALUES (?, ?, ?, ?, ?)", rows)
+        return rows
+
+    def _to_species(self, document):
+        default_variety = get_default_variety(document["varieties"])
+        pokemon_id = get_id_from_url(default_variety["pokemon"]["url"])
+        return Species(document["id"], document["name"], document["gender_rate"],
+                       document["generation"]["name"], pokemon_id)
+
+    def save_pokemon(self, document):
+        self.save_pokemon_documents([document])
+
+    def save_pokemon_documents(self, documents):
+        with self._conn.transaction():
+            for document in documents:
+                self._insert_pokemon(document)
+
+    def _insert_pokemon(self, document):
+        pokemon_id = document["id"]
+        abilities = dict.fromkeys(get_ability_name(a) for a in document["abilities"])
+        moves = dict.fromkeys(get_move_names(document["moves"]))
+        learnset = get_learnset(document["moves"])
+
+        self._conn.write("DELETE FROM pokemon_ability WHERE pokemon_id = ?", (pokemon_id,))
+        self._conn.write("DELETE FROM pokemon_move WHERE pokemon_id = ?", (pokemon_id,))
+        self._conn.write("DELETE FROM pokemon_learnset WHERE pokemon_id = ?", (pokemon_id,))
+        self._conn.write("DELETE FROM pokemon_type WHERE pokemon_id = ?", (pokemon_id,))
+        self._conn.write("INSERT OR REPLACE INTO pokemon (id, name) VALUES (?, ?)", (pokemon_id, document["name"]))
+        self._conn.write_many("INSERT INTO pokemon_ability (pokemon_id, ability) VALUES (?, ?)",
+                              [(pokemon_id, a) for a in abilities])
+        self._conn.write_many("INSERT INTO pokemon_move (pokemon_id, move) VALUES (?, ?)",
+                              [(pokemon_id, m) for m in moves])
+        self._conn.write_many("INSERT OR REPLACE INTO pokemon_learnset (pokemon_id, method, level, move, move_id) "
+                              "VALUES (?, ?, ?, ?, ?)",
+                              [(pokemon_id, method, level, move, i) for move, method, level, i in learnset])
+        self._conn.write_many("INSERT INTO pokemon_type (pokemon_id, slot, type) VALUES (?, ?, ?)",
+                              [(pokemon_id, t["slot"], t["type"]["name"]) for t in document.get("types", [])])
+
+    def save_type_documents(self, documents):
+        '''
+        Fills pokemon_type for every pokemon of the types, the index is complete once every type was saved
+        '''
+        documents = list(documents)
+        rows = [(get_id_from_url(p["pokemon"]["url"]), p["slot"], d["name"]) for d in documents for p in d["pokemon"]]
+        with self._conn.transaction():
+            self._conn.write_many("INSERT OR REPLACE INTO pokemon_type (pokemon_id, slot, type) VALUES (?, ?, ?)",
+                                  rows)
+            if set(TYPE_NAMES) <= set(d["name"] for d in documents):
+                self._conn.write("INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                                 ("type_index", json.dumps(TYPE_NAMES)))
+
+    def exist_type_index(self):
+        result = self._conn.read("SELECT value FROM metadata WHERE key = ?", ("type_index",))
+        return self._count_lookup("typeIndex", len(result) > 0 and result[0][0] == json.dumps(TYPE_NAMES))
+
+    def save_move_documents(self, documents):
+        rows = [(d["id"], d["name"].replace("-", ""), d["type"]["name"], d["power"], d["accuracy"],
+                 d["damage_class"]["name"]) for d in documents]
+        with self._conn.transaction():
+            self._conn.write_many("INSERT OR REPLACE INTO move (id, name, type, power, accuracy, damage_class) "
+                                  "VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def load_species(self, name):
+        column = "id" if name.isdigit() else "name"
+        result = self._conn.read("SELECT id, name, gender_rate, generation, pokemon_id FROM species "
+                                 "WHERE {column} = ?".format(column=column), (name,))
+        if not self._count_lookup("species", len(result) > 0):
+            raise CachedSpeciesNotExistException
+        return Species(*result[0])
+
+    def load_species_name(self, name):
+        '''
+        :param name: species name with its hyphens left out
+        '''
+        result = self._conn.read("SELECT name FROM species WHERE REPLACE(name, '-', '') = ?", (name,))
+        if len(result) == 0:
+            raise CachedSpeciesNotExistException
+        return result[0][0]
 
-        if self._is_not_exist_result(result):
-            raise CachedResponseNotExistException
-        return result[0]
+    def exist_species(self, name):
+        try:
+            self.load_species(name)
+            return True
+        except CachedSpeciesNotExistException:
+            return False
 
-    def _is_not_exist_result(self, result):
-        return result is None or len(result) == 0
+    def exist_pokemon(self, pokemon_id):
+        result = self._conn.read("SELECT 1 FROM pokemon WHERE id = ?", (pokemon_id,))
+        return self._count_lookup("pokemon", len(result) > 0)
+
+    def load_abilities(self, pokemon_id):
+        rows = self._conn.read("SELECT ability FROM pokemon_ability WHERE pokemon_id = ?", (pokemon_id,))
+        return [r[0] for r in rows]
+
+    def load_moves(self, pokemon_id):
+        rows = self._conn.read("SELECT move FROM pokemon_move WHERE pokemon_id = ?", (pokemon_id,))
+        return [r[0] for r in rows]
+
+    def load_moves_at_level(self, pokemon_id, level):
+        return [m.name for m in self._load_move_details_at_level(pokemon_id, level)]
+
+    def load_move_details_at_level(self, pokemon_id, level):
+        '''
+        :return: Moves learned by leveling up to level, most recently learned first
+        '''
+        moves = self._load_move_details_at_level(pokemon_id, level)
+        cached = sum(1 for m in moves if m.type is not None)
+        METRICS.increment("catalog.hit.move", cached)
+        METRICS.increment("catalog.miss.move", len(moves) - cached)
+        return moves
+
+    def _load_move_details_at_level(self, pokemon_id, level):
+        rows = self._conn.read("SELECT l.move, m.type, m.power, m.accuracy, m.damage_class FROM pokemon_learnset l "
+                               "LEFT JOIN move m ON m.id = l.move_id "
+                               "WHERE l.pokemon_id = ? AND l.method = ? AND l.level <= ? ORDER BY l.level DESC, l.move",
+                               (pokemon_id, LEVEL_UP_METHOD, level))
+        moves = {}
+        for row in rows:
+            moves.setdefault(row[0], Move(*row))
+        return list(moves.values())
+
+    def load_types(self, pokemon_id):
+        rows = self._conn.read("SELECT type FROM pokemon_type WHERE pokemon_id = ? ORDER BY slot", (pokemon_id,))
+        return [r[0] for r in rows]
+
+    def load_missing_move_ids(self):
+        rows = self._conn.read("SELECT DISTINCT move_id FROM pokemon_learnset "
+                               "WHERE move_id NOT IN (SELECT id FROM move) ORDER BY move_id")
+        return [r[0] for r in rows]
+
+    def load_missing_level_up_move_ids(self, pokemon_levels):
+        '''
+        :param pokemon_levels: {pokemon_id: level}
+        :return: ids of the moves not cached that the pokemons learn by leveling up to their level
+        '''
+        if len(pokemon_levels) == 0:
+            return []
+
+        bounds = ", ".join(["(?, ?)"] * len(pokemon_levels))
+        rows = self._conn.read("WITH bound (pokemon_id, level) AS (VALUES {bounds}) "
+                               "SELECT DISTINCT l.move_id FROM pokemon_learnset l "
+                               "JOIN bound b ON b.pokemon_id = l.pokemon_id AND l.level <= b.level "
+                               "WHERE l.method = ? AND l.move_id NOT IN (SELECT id FROM move) ORDER BY l.move_id"
+                               .format(bounds=bounds),
+                               (*[v for b in pokemon_levels.items() for v in b], LEVEL_UP_METHOD))
+        return [r[0] for r in rows]
+
+    def save_eligible_species(self, eligible, eligibility):
+        '''
+        Positions are numbered from 1 without gaps, so that a random pick is a single primary key lookup
+        '''
+        rows = [(position, i, name) for position, (i, name) in enumerate(eligible, start=1)]
+        with self._conn.transaction():
+            self._conn.write("DELETE FROM eligible_species")
+            self._conn.write_many("INSERT INTO eligible_species (position, id, name) VALUES (?, ?, ?)", rows)
+            self._conn.write("INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                             ("eligible_species", json.dumps(eligibility, sort_keys=True)))
+
+    def load_eligible_species_count(self, eligibility):
+        '''
+        :raise EligibleSpeciesIndexNotExistException: the index was never built or was built with other rules
+        '''
+        result = self._conn.read("SELECT value FROM metadata WHERE key = ?", ("eligible_species",))
+        count = None
+        if len(result) > 0 and result[0][0] == json.dumps(eligibility, sort_keys=True):
+            count = self._conn.read("SELECT MAX(position) FROM eligible_species")[0][0]
+        if not self._count_lookup("eligibleSpecies", count is not None):
+            raise EligibleSpeciesIndexNotExistException
+        return count
+
+    def _count_lookup(self, table, hit):
+        '''
+        Counted like the response cache, as "catalog.hit.species" or "catalog.miss.species"
+        :return: hit
+        '''
+        METRICS.increment("catalog.{outcome}.{table}".format(outcome="hit" if hit else "miss", table=table))
+        return hit
+
+    def load_eligible_species(self, position):
+        return self._conn.read("SELECT name FROM eligible_species WHERE position = ?", (position,))[0][0]
+
+    def load_eligible_species_types(self):
+        '''
+        The default pokemon of a species shares its id
+        :return: {name: types in slot order}, species whose types are unknown are left out
+        '''
+        rows = self._conn.read("SELECT e.name, t.type FROM eligible_species e "
+                               "JOIN pokemon_type t ON t.pokemon_id = e.id ORDER BY e.position, t.slot")
+        types = {}
+        for name, pokemon_type in rows:
+            types.setdefault(name, []).append(pokemon_type)
+        return types
+
+    def load_eligible_species_names(self):
+        return [r[0] for r in self._conn.read("SELECT name FROM eligible_species ORDER BY position")]
@@ -0,0 +1,97 @@
+import random
+
+from exceptions import TeamBalancingFailedException
+from typechart import TYPE_NAMES, get_weakness_vector, get_coverage_mask
+
+BEAM_WIDTH = 16
+# A type hit super effectively is worth as much as one weakness too many to an attacking type
+COVERAGE_WEIGHT = 1.0
+WEAKNESS_WEIGHT = 1.0
+
+
+class BalancedTeamSelector:
+    '''
+    Picks species whose types cover each other's weaknesses and together hit as many types super effectively as possible
+    Species sharing their types score the same, so the beam search runs over the distinct type combinations,
+    a couple of hundred rather than a thousand species, and species are drawn for the picked combinations afterwards
+    '''
+
+    def __init__(self, species_types, rng=random):
+        '''
+        :param species_types: {name: types} of the species to pick from
+        '''
+        self._random = rng
+        self._names = {}
+        for name, types in species_types.items():
+            self._names.setdefault(tuple(types), []).append(name)
+
+        # Shuffled, so that the stable sorts of the search break ties at random
+        self._combinations = list(self._names)
+        rng.shuffle(self._combinations)
+        self._weaknesses = [get_weakness_vector(c) for c in self._combinations]
+        self._coverages = [get_coverage_mask(c) for c in self._combinations]
+
+    def select(self, count, team_types=(), excluded_names=()):
+        '''
+        :param team_types: types of every Pokemon already in the team
+        :param excluded_names: species not to pick, like the ones already in the team
+        :return: names of count species
+        :raise TeamBalancingFailedException: fewer than count species to pick from
+        '''
+        available = [len([n for n in self._names[c] if n not in excluded_names]) for c in self._combinations]
+        if sum(available) < count:
+            raise TeamBalancingFailedException("Only {available} species to pick {count} from".format(
+                available=sum(available), count=count))
+
+        weakness = [0] * len(TYPE_NAMES)
+        coverage = 0
+        for types in team_types:
+            weakness = add_vectors(weakness, get_weakness_vector(types))
+            coverage |= get_coverage_mask(types)
+
+        beam = [(score_team(weakness, coverage), (), weakness, coverage)]
+        for _ in range(count):
+            beam = self._expand(beam, available)
+
+        best = beam[0][0]
+        picked = self._random.choice([p for s, p, _, _ in beam if s == best])
+        return self._draw_names(picked, excluded_names)
+
+    def _expand(self, beam, available):
+        seen = set()
+        candidates = []
+        for _, picked, weakness, coverage in beam:
+            for i in range(len(self._combinations)):
+                if picked.count(i) >= available[i]:
+                    continue
+                key = tuple(sorted(picked + (i,)))
+                if key in seen:
+                    continue
+                seen.add(key)
+                next_weakness = add_vectors(weakness, self._weaknesses[i])
+                next_coverage = coverage | self._coverages[i]
+                candidates.append((score_team(next_weakness, next_coverage), key, next_weakness, next_coverage))
+
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        return candidates[:BEAM_WIDTH]
+
+    def _draw_names(self, picked, excluded_names):
+        names = []
+        for i in picked:
+            pool = [n for n in self._names[self._combinations[i]] if n not in excluded_names and n not in names]
+            names.append(self._random.choice(pool))
+        self._random.shuffle(names)
+        return names
+
+
+def add_vectors(a, b):
+    return [x + y for x, y in zip(a, b)]
+
+
+def score_team(weakness, coverage):
+    '''
+    :param weakness: summed weakness levels of the team to every attacking type
+    :param coverage: bits of the types the team hits super effectively
+    '''
+    exposed = sum(w for w in weakness if w > 0)
+    return COVERAGE_WEIGHT * bin(coverage).count("1") - WEAKNESS_WEIGHT * exposed
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+
+from batchgenerator import BatchTrainerGenerator, load_trainer_spec
+from exceptions import InvalidTrainerSpecException
+from pokemonwikiapi import PokemonWikiApi, Move
+
+
+LEARNSET = {"tackle": 1, "growl": 1, "vinewhip": 3, "leechseed": 9, "razorleaf": 12}
+
+
+class LocalPokemonWikiApi(PokemonWikiApi):
+    def assert_exist_pokemon_species(self, name):
+        pass
+
+    def get_pokemon_abilities(self, name):
+        return ["overgrow"]
+
+    def is_pokemon_genderless(self, name):
+        return False
+
+    def get_pokemon_moves(self, name):
+        return list(LEARNSET)
+
+    def get_pokemon_moves_at_level(self, name, level):
+        return [m for m, l in LEARNSET.items() if l <= level]
+
+    def get_pokemon_move_details_at_level(self, name, level):
+        return [Move(m, None, None, None, None) for m in self.get_pokemon_moves_at_level(name, level)]
+
+    def get_pokemon_types(self, name):
+        return ["grass", "poison"]
+
+    def get_random_pokemon_name(self, rng=None):
+        return "bulbasaur"
+
+    def prefetch(self, names, levels=None):
+        pass
+
+    def get_species_name(self, name):
+        return name
+
+
+class TestBatchTrainerGenerator(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.generator = BatchTrainerGenerator(LocalPokemonWikiApi())
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write_spec(self, spec):
+        filepath = os.path.join(self.directory.name, "spec.json")
+        with open(filepath, "w") as file:
+            json.dump(spec, file)
+        return filepath
+
+    def test_load_spec_with_defaults(self):
+        filepath = self._write_spec({"defaults": {"teamSize": 3},
+                                     "trainers": [{"name": "red"}, {"name": "blue", "teamSize": 1}]})
+        assert load_trainer_spec(filepath) == [{"teamSize": 3, "name": "red"}, {"teamSize": 1, "name": "blue"}]
+
+    def test_load_spec_without_trainers(self):
+        filepath = self._write_spec({"defaults": {}})
+        with self.assertRaises(InvalidTrainerSpecException):
+            load_trainer_spec(filepath)
+
+    def test_generate_trainer(self):
+        trainer = self.generator.generate({"name": "red", "teamSize": 3, "level": {"min": 5, "max": 9},
+                                           "winCommand": "say gg"})
+
+        assert trainer.properties["winCommand"] == "say gg"
+        assert len(trainer.properties["team"]) == 3
+        assert all(5 <= p["level"] <= 9 for p in trainer.properties["team"])
+        assert all(LEARNSET[m] <= p["level"] for p in trainer.properties["team"] for m in p["moveset"])
+
+    def test_reject_team_over_size(self):
+        with self.assertRaises(InvalidTrainerSpecException):
+            self.generator.generate({"name": "red", "team": ["bulbasaur"] * 7})
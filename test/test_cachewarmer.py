@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+import commands.cache as cache_commands
+from cachewarmer import CacheWarmer, load_species_list_file
+from commands.misc import CloseCommandPromptCommand
+from common import TokenBucket
+from exceptions import CommandPromptCloseException
+from pokeapistandin import PokeApiStandIn
+from pokemonwikiapi import PokeApi, Sqlite3, NormalizedSqlite3, ConnectionManager
+
+FIXTURE_DIRPATH = os.path.join(os.path.dirname(__file__), "fixtures", "pokeapi")
+
+
+class TestCacheWarmer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.directory.name, "pokemon.db")
+        self.stand_in = PokeApiStandIn(FIXTURE_DIRPATH).start()
+        self.api = PokeApi(self.stand_in.base_url, Sqlite3("pokeapi", self.filepath),
+                           NormalizedSqlite3(self.filepath), TokenBucket(1000, 1000))
+        PokeApi._memo.clear()
+
+    def tearDown(self):
+        self.stand_in.stop()
+        ConnectionManager.get(self.filepath).close()
+        self.directory.cleanup()
+
+    def test_warm_generation(self):
+        names = self.api.get_generation_species_names("generation-ix")
+        cached = CacheWarmer(self.api).run(names)
+
+        assert names == ["sprigatito"]
+        assert cached == 1
+        assert self.api.is_pokemon_cached("sprigatito")
+        assert not self.api.is_pokemon_cached("pikachu")
+
+    def test_resume_after_stop(self):
+        names = self.api.get_species_names()
+        warmer = CacheWarmer(self.api)
+        warmer.BATCH_SIZE = 2
+        warmer.run(names, lambda w: w.stop())
+        assert warmer.cached == 2
+
+        requests_before = self.stand_in.request_count
+        resumed = CacheWarmer(self.api)
+        resumed.run(names + ["missingno"])
+
+        assert resumed.cached == len(names)
+        assert resumed.failed == 1
+        assert resumed.moves_cached == resumed.moves_total == 35
+        assert self.stand_in.request_count - requests_before == 2 * (len(names) - 2) + 1 + 35
+        assert self.api.get_missing_move_ids() == []
+
+    def test_stop_on_close(self):
+        self.stand_in.latency = 0.05
+        warmer = CacheWarmer(self.api)
+        warmer.BATCH_SIZE = 2
+        cache_commands._warmer = warmer
+        try:
+            warmer.start(self.api.get_species_names())
+            with self.assertRaises(CommandPromptCloseException):
+                CloseCommandPromptCommand().execute(None)
+        finally:
+            cache_commands._warmer = None
+
+        assert not warmer.is_running()
+        assert warmer.cached < warmer.total
+
+    def test_load_species_list_file(self):
+        filepath = os.path.join(self.directory.name, "species.txt")
+        with open(filepath, "w") as file:
+            file.write("# starters\nBulbasaur\n\ncharmander\n")
+
+        assert load_species_list_file(filepath) == ["bulbasaur", "charmander"]
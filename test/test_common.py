@@ -0,0 +1,132 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from common import LruCache, SingleFlight, TokenBucket, configure_file_logging, stop_file_logging
+from exceptions import LruCacheMissException
+
+
+class TestLruCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = LruCache(2)
+
+    def test_get_cached_value(self):
+        self.cache.put("bulbasaur", 1)
+        assert self.cache.get("bulbasaur") == 1
+        assert self.cache.hits == 1
+
+    def test_get_missing_value(self):
+        with self.assertRaises(LruCacheMissException):
+            self.cache.get("ivysaur")
+        assert self.cache.misses == 1
+
+    def test_evict_least_recently_used(self):
+        self.cache.put("bulbasaur", 1)
+        self.cache.put("ivysaur", 2)
+        self.cache.get("bulbasaur")
+        self.cache.put("venusaur", 3)
+
+        with self.assertRaises(LruCacheMissException):
+            self.cache.get("ivysaur")
+        assert self.cache.get("bulbasaur") == 1
+        assert len(self.cache) == 2
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_acquire_within_burst_without_waiting(self):
+        bucket = TokenBucket(rate=1, burst=3)
+        start = time.monotonic()
+        for _ in range(3):
+            bucket.acquire()
+        assert time.monotonic() - start < 0.1
+
+    def test_acquire_waits_for_refill(self):
+        bucket = TokenBucket(rate=20, burst=1)
+        start = time.monotonic()
+        for _ in range(3):
+            bucket.acquire()
+        assert time.monotonic() - start >= 0.09
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+    def _call(self, result):
+        self.calls.append(result)
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _run_concurrently(self, result):
+        outcomes = []
+
+        def run():
+            try:
+                outcomes.append(self.single_flight.run("bulbasaur", self._call, result))
+            except Exception as e:
+                outcomes.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(3)]
+        threads[0].start()
+        self.started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        # Followers are waiting once they no longer run, there is nothing else to wait on
+        time.sleep(0.05)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_merge_concurrent_calls(self):
+        assert self._run_concurrently(1) == [1, 1, 1]
+        assert self.calls == [1]
+        assert self.single_flight.run("bulbasaur", lambda: 2) == 2
+
+    def test_share_exception(self):
+        error = ValueError("bulbasaur")
+        assert self._run_concurrently(error) == [error, error, error]
+        assert self.calls == [error]
+
+
+class TestConfigureFileLogging(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.directory.name, "test.log")
+        self.root = logging.getLogger()
+        self.handlers = list(self.root.handlers)
+        self.level = self.root.level
+
+    def tearDown(self):
+        self.root.handlers = self.handlers
+        self.root.setLevel(self.level)
+        self.directory.cleanup()
+
+    def test_write_through_listener(self):
+        listener = configure_file_logging(self.filepath, logging.WARNING)
+        logger = logging.getLogger("test.common")
+        logger.info("not written")
+        logger.warning("written")
+        stop_file_logging(listener)
+
+        with open(self.filepath) as file:
+            text = file.read()
+        assert "written" in text
+        assert "not written" not in text
+
+    def test_rotate_by_size(self):
+        listener = configure_file_logging(self.filepath, max_bytes=200, backup_count=2)
+        for i in range(20):
+            logging.getLogger("test.common").debug("message {}".format(i))
+        stop_file_logging(listener)
+
+        assert sorted(os.listdir(self.directory.name)) == ["test.log", "test.log.1", "test.log.2"]
@@ -1,8 +1,13 @@
+import json
+import os
+import sqlite3
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
-from pokemonwikiapi import Sqlite3
+from pokemonwikiapi import Sqlite3, CachedResponse, ConnectionManager
 
 
 class TestDatabase(unittest.TestCase):
@@ -18,4 +23,59 @@ class TestDatabase(unittest.TestCase):
 
     def test_load_request(self):
         cached = self.database.load_response(self.url)
-        assert cached == self.response.text
\ No newline at end of file
+        assert cached == self.response.text
+
+
+class TestSqlite3Compression(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.directory.name, "pokemon.db")
+        self.url = "https://pokeapi.co/api/v2/pokemon/132/"
+        self.text = json.dumps({"name": "ditto", "moves": [{"move": {"name": "transform"}}] * 100})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_compressed_response(self):
+        database = Sqlite3("pokeapi", self.filepath)
+        database.save_response(CachedResponse(self.url, self.text))
+        database.save_response(CachedResponse(self.url, self.text))
+
+        assert database.load_response(self.url) == self.text
+
+    def test_load_uncompressed_response(self):
+        conn = sqlite3.connect(self.filepath)
+        conn.execute("CREATE TABLE pokeapi (url TEXT PRIMARY KEY, response TEXT)")
+        conn.execute("INSERT INTO pokeapi (url, response) VALUES (?, ?)", (self.url, self.text))
+        conn.commit()
+        conn.close()
+
+        database = Sqlite3("pokeapi", self.filepath)
+
+        assert database.load_response(self.url) == self.text
+
+
+class TestConnectionManager(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.directory.name, "pokemon.db")
+
+    def tearDown(self):
+        ConnectionManager.get(self.filepath).close()
+        self.directory.cleanup()
+
+    def test_share_connection(self):
+        assert ConnectionManager.get(self.filepath) is ConnectionManager.get(self.filepath)
+
+    def test_save_from_worker_threads(self):
+        database = Sqlite3("pokeapi", self.filepath)
+        urls = ["https://pokeapi.co/api/v2/pokemon/{}/".format(i) for i in range(1, 51)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda url: database.save_response(CachedResponse(url, "{}")), urls))
+        ConnectionManager.get(self.filepath).flush()
+
+        conn = sqlite3.connect(self.filepath)
+        count = conn.execute("SELECT COUNT(*) FROM pokeapi").fetchone()[0]
+        conn.close()
+        assert count == len(urls)
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+import unittest
+
+from importmanifest import ImportManifest, describe_entry
+
+
+class TestImportManifest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.import_dir = os.path.join(self.directory.name, "import")
+        self.manifest_filepath = os.path.join(self.directory.name, "import_manifest.json")
+        os.makedirs(self.import_dir)
+        self._write("brock.json", json.dumps({"team": [{"species": "cobblemon:onix", "level": 14}]}))
+        self._write("broken.json", "{")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write(self, filename, text):
+        with open(os.path.join(self.import_dir, filename), "w") as file:
+            file.write(text)
+
+    def _create_manifest(self):
+        return ImportManifest(self.import_dir, self.manifest_filepath)
+
+    def test_summarize_valid_files(self):
+        entries = self._create_manifest().get_valid_entries()
+
+        assert [e["filename"] for e in entries] == ["brock.json"]
+        assert entries[0]["summary"] == {"name": "brock", "team": ["onix"], "levels": [14]}
+        assert describe_entry(entries[0]) == "brock: onix 14 (brock.json)"
+
+    def test_skip_unchanged_files(self):
+        self._create_manifest().refresh()
+        filepath = os.path.join(self.import_dir, "brock.json")
+        stat = os.stat(filepath)
+        self._write("brock.json", "x" * stat.st_size)
+        os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        entries = self._create_manifest().get_valid_entries()
+
+        assert [e["filename"] for e in entries] == ["brock.json"]
+
+    def test_revalidate_changed_and_removed_files(self):
+        self._create_manifest().refresh()
+        self._write("broken.json", "{}")
+        os.remove(os.path.join(self.import_dir, "brock.json"))
+
+        entries = self._create_manifest().refresh()
+
+        assert [(e["filename"], e["valid"]) for e in entries] == [("broken.json", True)]
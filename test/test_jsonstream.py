@@ -0,0 +1,76 @@
+import json
+import os
+import unittest
+
+from benchmark import create_large_pokemon_document
+from jsonstream import iter_fields
+from pokemonwikiapi import extract_pokemon_document, get_ability_name, get_learnset, get_move_names
+
+FIXTURE_DIRPATH = os.path.join(os.path.dirname(__file__), "fixtures", "pokeapi")
+
+
+class TestIterFields(unittest.TestCase):
+    def test_iter_fields(self):
+        text = ' {"id": 1, "moves" : [ {"a": [1]}, 2 ], "sprites": {"moves": []}, "empty": [], "name": " a "} '
+        events = list(iter_fields(text, {"id", "name"}, {"moves", "empty"}))
+        assert events == [("id", 1), ("moves", {"a": [1]}), ("moves", 2), ("name", " a ")]
+
+    def test_streamed_field_not_array(self):
+        assert list(iter_fields('{"moves": null}', {"moves"}, {"moves"})) == [("moves", None)]
+
+    def test_invalid_document(self):
+        for text in ["", "[]", '{"id": 1', '{"id": 1}}', '{id: 1}', '{"moves": [1,]}', '{"moves": [1 2]}']:
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_fields(text, {"id"}, {"moves"}))
+
+
+class TestExtractPokemonDocument(unittest.TestCase):
+    def assert_same_rows(self, text):
+        document = json.loads(text)
+        extracted = extract_pokemon_document(text)
+        assert extracted["id"] == document["id"]
+        assert extracted["name"] == document["name"]
+        assert [get_ability_name(a) for a in extracted["abilities"]] == \
+               [get_ability_name(a) for a in document["abilities"]]
+        assert get_move_names(extracted["moves"]) == get_move_names(document["moves"])
+        assert get_learnset(extracted["moves"]) == get_learnset(document["moves"])
+        assert extracted["types"] == [{"slot": t["slot"], "type": {"name": t["type"]["name"]}}
+                                      for t in document.get("types", [])]
+
+    def test_fixtures(self):
+        dirpath = os.path.join(FIXTURE_DIRPATH, "pokemon")
+        for name in os.listdir(dirpath):
+            with open(os.path.join(dirpath, name, "index.json"), "r", encoding="utf-8") as file:
+                self.assert_same_rows(file.read())
+
+    def test_large_document(self):
+        text = create_large_pokemon_document(move_count=50, version_group_count=5)
+        self.assert_same_rows(text)
+        extracted = extract_pokemon_document(text)
+        # Only the latest version group is kept, every move refers to the same object for it rather than a copy
+        assert all(len(m["version_group_details"]) == 1 for m in extracted["moves"])
+        assert extracted["moves"][0]["version_group_details"][0]["version_group"] is \
+               extracted["moves"][1]["version_group_details"][0]["version_group"]
+        assert extracted["moves"][0]["version_group_details"][0]["version_group"]["name"] == "version-group-5"
+
+    def test_keep_learnset_version_group_only(self):
+        def detail(level, version_group, version_group_id):
+            return {"level_learned_at": level, "move_learn_method": {"name": "level-up", "url": "/method/1/"},
+                    "version_group": {"name": version_group, "url": "/version-group/{}/".format(version_group_id)}}
+
+        document = {"id": 1, "name": "bulbasaur", "abilities": [], "moves": [
+            {"move": {"name": "tackle", "url": "/move/33/"},
+             "version_group_details": [detail(1, "sword-shield", 20), detail(1, "red-blue", 1)]},
+            {"move": {"name": "vine-whip", "url": "/move/22/"},
+             "version_group_details": [detail(3, "scarlet-violet", 25), detail(7, "sword-shield", 20)]},
+            {"move": {"name": "growl", "url": "/move/45/"}, "version_group_details": [detail(1, "red-blue", 1)]},
+        ]}
+        text = json.dumps(document)
+        self.assert_same_rows(text)
+
+        extracted = extract_pokemon_document(text)
+        assert [len(m["version_group_details"]) for m in extracted["moves"]] == [0, 1, 0]
+
+    def test_invalid_document(self):
+        with self.assertRaises(json.JSONDecodeError):
+            extract_pokemon_document("Not Found")
@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from benchmark import DEFERRED_MODULES
+
+ROOT_DIRPATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestMain(unittest.TestCase):
+    def test_import_without_side_effects(self):
+        with tempfile.TemporaryDirectory() as dirpath:
+            script = "import sys, main; print(' '.join(m for m in sys.argv[1:] if m in sys.modules))"
+            output = subprocess.run([sys.executable, "-c", script, *DEFERRED_MODULES], cwd=dirpath, check=True,
+                                    capture_output=True, text=True, env={**os.environ, "PYTHONPATH": ROOT_DIRPATH})
+
+            assert output.stdout.strip() == ""
+            assert os.listdir(dirpath) == []
@@ -0,0 +1,39 @@
+import unittest
+
+from metrics import Metrics, Histogram
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+
+    def test_count(self):
+        self.metrics.increment("cache.hit.pokemon")
+        self.metrics.increment("cache.hit.pokemon", 2)
+
+        assert self.metrics.snapshot()["counters"] == {"cache.hit.pokemon": 3}
+
+    def test_time(self):
+        with self.metrics.time("db.read"):
+            pass
+
+        histogram = self.metrics.snapshot()["histograms"]["db.read"]
+        assert histogram["count"] == 1
+        assert sum(histogram["buckets"].values()) == 1
+
+    def test_reset(self):
+        self.metrics.increment("memo.miss.pokemon")
+        self.metrics.reset()
+
+        assert self.metrics.snapshot() == {"counters": {}, "histograms": {}}
+
+
+class TestHistogram(unittest.TestCase):
+    def test_quantile_is_bucket_bound(self):
+        histogram = Histogram()
+        for seconds in [0.002] * 9 + [0.2]:
+            histogram.observe(seconds)
+
+        assert histogram.quantile(0.5) == 5
+        assert histogram.quantile(0.95) == histogram.max
+        assert histogram.max == 200
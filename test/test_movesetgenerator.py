@@ -0,0 +1,45 @@
+import random
+import unittest
+
+from movesetgenerator import select_coverage_moveset, prune_candidates, get_move_value, CANDIDATE_LIMIT
+from pokemonwikiapi import Move
+
+
+class TestSelectCoverageMoveset(unittest.TestCase):
+    def setUp(self):
+        self.moves = [
+            Move("thunderbolt", "electric", 90, 100, "special"),
+            Move("thundershock", "electric", 40, 100, "special"),
+            Move("spark", "electric", 65, 100, "physical"),
+            Move("irontail", "steel", 100, 75, "physical"),
+            Move("quickattack", "normal", 40, 100, "physical"),
+            Move("thunderwave", "electric", None, 90, "status"),
+            Move("growl", "normal", None, 100, "status"),
+        ]
+
+    def test_prefer_stab_and_coverage(self):
+        movesets = [sorted(select_coverage_moveset(self.moves, ["electric"], random.Random(seed)))
+                    for seed in range(20)]
+
+        assert ["irontail", "quickattack", "spark", "thunderbolt"] in movesets
+        for moveset in movesets:
+            assert {"thunderbolt", "irontail"} <= set(moveset)
+            assert not {"thunderwave", "growl"} & set(moveset)
+
+    def test_return_every_move_when_few(self):
+        assert select_coverage_moveset(self.moves[:3], ["electric"]) == ["thunderbolt", "thundershock", "spark"]
+
+    def test_get_move_value(self):
+        assert get_move_value(self.moves[0], ["electric"]) == 1.35
+        assert get_move_value(self.moves[3], ["electric"]) == 0.75
+        assert get_move_value(self.moves[5], ["electric"]) == 0.0
+
+    def test_prune_keeps_every_attacking_type(self):
+        moves = [Move("move{}".format(i), "normal", 100, 100, "physical") for i in range(20)]
+        moves.append(Move("ember", "fire", 40, 100, "special"))
+        values = [get_move_value(m, ["normal"]) for m in moves]
+
+        kept = prune_candidates(moves, values)
+
+        assert len(kept) == CANDIDATE_LIMIT
+        assert len(moves) - 1 in kept
@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+import unittest
+import warnings
+import zipfile
+
+from exceptions import CachedResponseNotExistException, PokeApiDumpNotFoundException
+from pokeapidump import PokeApiDumpImporter
+from pokemonwikiapi import Sqlite3, NormalizedSqlite3
+
+SPECIES = {
+    "id": 4,
+    "name": "charmander",
+    "gender_rate": 1,
+    "generation": {"name": "generation-i", "url": "/api/v2/generation/1/"},
+    "varieties": [{"is_default": True, "pokemon": {"name": "charmander", "url": "/api/v2/pokemon/4/"}}]
+}
+POKEMON = {
+    "id": 4,
+    "name": "charmander",
+    "abilities": [{"ability": {"name": "solar-power", "url": "/api/v2/ability/94/"}}],
+    "moves": [{"move": {"name": "scratch", "url": "/api/v2/move/10/"}}]
+}
+SPECIES_LIST = {"count": 1, "results": [{"name": "charmander", "url": "/api/v2/pokemon-species/4/"}]}
+
+
+class TestPokeApiDumpImporter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.api_dirpath = os.path.join(self.directory.name, "data", "api", "v2")
+        self._write_document("pokemon-species", SPECIES_LIST)
+        self._write_document(os.path.join("pokemon-species", "4"), SPECIES)
+        self._write_document(os.path.join("pokemon", "4"), POKEMON)
+        filepath = os.path.join(self.directory.name, "pokemon.db")
+        self.database = Sqlite3("pokeapi", filepath)
+        self.catalog = NormalizedSqlite3(filepath)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write_document(self, path, document):
+        dirpath = os.path.join(self.api_dirpath, path)
+        os.makedirs(dirpath, exist_ok=True)
+        with open(os.path.join(dirpath, "index.json"), "w") as file:
+            json.dump(document, file)
+
+    def test_import_under_lookup_urls(self):
+        count = PokeApiDumpImporter(self.database, self.catalog).run(self.directory.name)
+
+        assert count == 4
+        by_name = json.loads(self.database.load_response("https://pokeapi.co/api/v2/pokemon-species/charmander"))
+        by_index = json.loads(self.database.load_response("https://pokeapi.co/api/v2/pokemon-species/4"))
+        assert by_name == by_index
+        assert by_name["varieties"][0]["pokemon"]["url"] == "https://pokeapi.co/api/v2/pokemon/4/"
+        assert json.loads(self.database.load_response("https://pokeapi.co/api/v2/pokemon/4/"))["name"] == "charmander"
+        assert json.loads(self.database.load_response("https://pokeapi.co/api/v2/pokemon-species/"))["count"] == 1
+
+    def test_import_into_normalized_tables(self):
+        PokeApiDumpImporter(self.database, self.catalog).run(self.directory.name)
+
+        species = self.catalog.load_species("charmander")
+        assert species.generation == "generation-i"
+        assert species.pokemon_id == 4
+        assert self.catalog.load_abilities(4) == ["solarpower"]
+        assert self.catalog.load_moves(4) == ["scratch"]
+
+    def test_import_missing_dump(self):
+        with self.assertRaises(PokeApiDumpNotFoundException):
+            PokeApiDumpImporter(self.database, self.catalog).run(os.path.join(self.directory.name, "missing"))
+
+    def _write_zip(self, members):
+        filepath = os.path.join(self.directory.name, "api-data-master.zip")
+        with warnings.catch_warnings(), zipfile.ZipFile(filepath, "w") as archive:
+            warnings.simplefilter("ignore")  # zipfile warns about the duplicate names written on purpose
+            for name, document in members:
+                archive.writestr(name, json.dumps(document))
+        return filepath
+
+    def test_import_zip(self):
+        prefix = "api-data-master/data/api/v2/"
+        filepath = self._write_zip([(prefix + "pokemon-species/index.json", SPECIES_LIST),
+                                    (prefix + "pokemon-species/4/index.json", SPECIES),
+                                    (prefix + "pokemon/4/index.json", POKEMON)])
+
+        count = PokeApiDumpImporter(self.database, self.catalog).run(filepath)
+
+        assert count == 4
+        assert json.loads(self.database.load_response("https://pokeapi.co/api/v2/pokemon/4/"))["name"] == "charmander"
+        assert self.catalog.load_species("charmander").pokemon_id == 4
+
+    def test_skip_crafted_zip_members(self):
+        prefix = "api-data-master/data/api/v2/"
+        squirtle = dict(SPECIES, id=7, name="squirtle")
+        filepath = self._write_zip([(prefix + "pokemon-species/index.json", SPECIES_LIST),
+                                    (prefix + "pokemon-species/4/index.json", SPECIES),
+                                    (prefix + "pokemon/4/index.json", POKEMON),
+                                    (prefix + "pokemon/4/index.json", dict(POKEMON, name="mewtwo")),
+                                    ("api-data-master/README.md", {}),
+                                    ("api-data-master/pokemon-species/7/index.json", squirtle),
+                                    (prefix + "pokemon-species/../../../../pokemon-species/7/index.json", squirtle),
+                                    (prefix + "pokemon-species/./7/index.json", squirtle)])
+
+        with self.assertLogs("pokeapidump", "WARNING") as logs:
+            count = PokeApiDumpImporter(self.database, self.catalog).run(filepath)
+
+        assert count == 4
+        assert json.loads(self.database.load_response("https://pokeapi.co/api/v2/pokemon/4/"))["name"] == "charmander"
+        assert not self.catalog.exist_species("squirtle")
+        with self.assertRaises(CachedResponseNotExistException):
+            self.database.load_response("https://pokeapi.co/api/v2/pokemon-species/7")
+        assert len([o for o in logs.output if "more than once" in o]) == 1
+        assert len([o for o in logs.output if "leaves " + prefix in o]) == 2
+        assert len(logs.output) == 3
+
+    def test_import_zip_without_dump(self):
+        filepath = self._write_zip([("api-data-master/README.md", {})])
+
+        with self.assertRaises(PokeApiDumpNotFoundException):
+            PokeApiDumpImporter(self.database, self.catalog).run(filepath)
@@ -0,0 +1,204 @@
+import os
+import random
+import tempfile
+import threading
+import unittest
+
+import requests
+
+from commands.pokemon import reroll_movesets
+from common import TokenBucket
+from exceptions import ApiRequestFailedException, CachedResponseNotExistException
+from metrics import METRICS
+from pokeapistandin import PokeApiStandIn, record_fixtures
+from pokemonfactory import RandomizedPokemonFactory
+from pokemonwikiapi import CachedResponse, PokeApi, Sqlite3, NormalizedSqlite3, ConnectionManager
+from teambalancer import BalancedTeamSelector
+
+FIXTURE_DIRPATH = os.path.join(os.path.dirname(__file__), "fixtures", "pokeapi")
+
+
+class TestPokeApiStandIn(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.directory.name, "pokemon.db")
+        self.stand_in = PokeApiStandIn(FIXTURE_DIRPATH).start()
+        self.database = Sqlite3("pokeapi", self.filepath)
+        self.api = PokeApi(self.stand_in.base_url, self.database, NormalizedSqlite3(self.filepath),
+                           TokenBucket(1000, 1000))
+        PokeApi._memo.clear()
+
+    def tearDown(self):
+        self.stand_in.stop()
+        ConnectionManager.get(self.filepath).close()
+        self.directory.cleanup()
+
+    def test_get_pokemon_ability(self):
+        abilities = self.api.get_pokemon_abilities("charmander")
+        assert sorted(abilities) == ["blaze", "solarpower"]
+        assert self.api.is_pokemon_genderless("magnemite")
+
+    def test_get_random_pokemon_name(self):
+        names = self.api.get_eligible_pokemon_names()
+        assert names == ["bulbasaur", "charmander", "pikachu", "magnemite", "mr-mime", "eevee"]
+        assert self.api.get_random_pokemon_name() in names
+
+    def test_create_random_hyphenated_pokemon(self):
+        # Mr. Mime is the fifth eligible species by id
+        seed = next(s for s in range(100) if random.Random(s).randint(1, 6) == 5)
+        name = self.api.get_random_pokemon_name(random.Random(seed))
+        assert name == "mr-mime"
+
+        pokemon = RandomizedPokemonFactory(self.api, random.Random(0)).create(name)
+        assert pokemon["species"] == "cobblemon:mrmime"
+        assert pokemon["ability"] in ["soundproof", "filter", "technician"]
+
+    def test_reroll_hyphenated_pokemon_moveset(self):
+        pokemon = RandomizedPokemonFactory(self.api, random.Random(0)).create("mr-mime", 20)
+        pokemon["level"] = 1
+
+        assert reroll_movesets(self.api, [pokemon]) == [pokemon]
+        assert pokemon["moveset"] == ["growl"]
+
+    def test_get_pokemon_moves_at_level(self):
+        assert self.api.get_pokemon_moves_at_level("eevee", 1) == ["tackle", "tailwhip"]
+        assert self.api.get_pokemon_moves_at_level("eevee", 12) == ["quickattack", "sandattack", "tackle", "tailwhip"]
+
+    def test_prefetch_moves(self):
+        self.api.get_pokemon_moves("pikachu")
+        assert self.api.prefetch_moves() == 8
+        assert self.api.get_missing_move_ids() == []
+
+        pokemon = RandomizedPokemonFactory(self.api, random.Random(0)).create("pikachu", 30)
+        assert sorted(pokemon["moveset"]) == ["electroball", "quickattack", "thunderbolt", "thundershock"]
+
+    def test_not_fetch_moves_on_interactive_create(self):
+        pokemon = RandomizedPokemonFactory(self.api, random.Random(0)).create("pikachu", 30)
+
+        # Species and pokemon only, the moveset is drawn at random until the moves are cached
+        assert self.stand_in.request_count == 2
+        assert len(pokemon["moveset"]) == 4
+        assert len(self.api.get_missing_move_ids()) == 8
+
+    def test_prefetch_moves_up_to_level(self):
+        self.api.prefetch(["pikachu", "eevee", "pikachu"], [5, 1, 4])
+
+        # Thunder Shock, Tail Whip, Quick Attack and Thunder Wave of Pikachu, Tackle of Eevee
+        assert self.stand_in.request_count == 4 + 5
+        requests_before = self.stand_in.request_count
+        pokemon = RandomizedPokemonFactory(self.api, random.Random(0)).create("pikachu", 5)
+        assert sorted(pokemon["moveset"]) == ["quickattack", "tailwhip", "thundershock", "thunderwave"]
+        assert self.stand_in.request_count == requests_before
+
+    def test_prefetch_into_each_cache_file(self):
+        filepath = os.path.join(self.directory.name, "other.db")
+        database = Sqlite3("pokeapi", filepath)
+        api = PokeApi(self.stand_in.base_url, database, NormalizedSqlite3(filepath), TokenBucket(1000, 1000))
+        try:
+            self.api.prefetch(["pikachu"])
+            api.prefetch(["pikachu"])
+
+            url = self.stand_in.base_url + "pokemon-species/pikachu"
+            assert database.load_response(url) == self.database.load_response(url)
+        finally:
+            ConnectionManager.get(filepath).close()
+
+    def test_get_eligible_pokemon_types(self):
+        types = self.api.get_eligible_pokemon_types()
+        requests_before = self.stand_in.request_count
+
+        assert types == {
+            "bulbasaur": ["grass", "poison"],
+            "charmander": ["fire"],
+            "pikachu": ["electric"],
+            "magnemite": ["electric", "steel"],
+            "mr-mime": ["psychic", "fairy"],
+            "eevee": ["normal"],
+        }
+        assert self.api.get_eligible_pokemon_types() == types
+        assert self.stand_in.request_count == requests_before
+
+    def test_create_balanced_team(self):
+        species_types = self.api.get_eligible_pokemon_types()
+        names = BalancedTeamSelector(species_types, random.Random(0)).select(len(species_types))
+        assert sorted(names) == sorted(species_types)
+
+        team = RandomizedPokemonFactory(self.api, random.Random(0)).create_team(names)
+        assert "cobblemon:mrmime" in [p["species"] for p in team]
+
+    def test_paginate_list(self):
+        response = requests.get(self.stand_in.base_url + "pokemon-species/?limit=2&offset=1").json()
+        assert response["count"] == 7
+        assert [r["name"] for r in response["results"]] == ["charmander", "pikachu"]
+
+    def test_count_catalog_lookups(self):
+        METRICS.reset()
+        self.api.get_pokemon_abilities("pikachu")
+        cold = METRICS.snapshot()["counters"]
+        self.api.get_pokemon_move_details_at_level("pikachu", 5)
+        warm = METRICS.snapshot()["counters"]
+
+        assert cold["catalog.miss.species"] == 1
+        assert cold["catalog.miss.pokemon"] == 1
+        assert warm["catalog.hit.species"] == cold.get("catalog.hit.species", 0) + 1
+        assert warm["catalog.hit.pokemon"] == cold.get("catalog.hit.pokemon", 0) + 1
+        assert warm["catalog.miss.move"] == 4
+
+    def test_merge_concurrent_requests(self):
+        self.stand_in.latency = 0.2
+        apis = [PokeApi(self.stand_in.base_url, self.database, NormalizedSqlite3(self.filepath), TokenBucket(1000, 1000))
+                for _ in range(2)]
+        barrier = threading.Barrier(len(apis))
+        results = []
+
+        def lookup(api):
+            barrier.wait()
+            results.append(api.is_pokemon_genderless("magnemite"))
+
+        threads = [threading.Thread(target=lookup, args=(a,)) for a in apis]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [True, True]
+        assert self.stand_in.request_count == 1
+
+    def test_not_cache_server_error(self):
+        self.stand_in.error_rate = 1.0
+        with self.assertRaises(ApiRequestFailedException):
+            self.api.get_pokemon_abilities("pikachu")
+
+        self.stand_in.error_rate = 0.0
+        assert sorted(self.api.get_pokemon_abilities("pikachu")) == ["lightningrod", "static"]
+
+    def test_not_cache_not_found(self):
+        for _ in range(2):
+            with self.assertRaises(ApiRequestFailedException):
+                self.api.assert_exist_pokemon_species("missingno")
+
+        assert self.stand_in.request_count == 2
+        with self.assertRaises(CachedResponseNotExistException):
+            self.database.load_response(self.stand_in.base_url + "pokemon-species/missingno")
+
+    def test_record_fixtures_skip_not_found(self):
+        self.api.get_pokemon_moves("eevee")
+        self.database.save_response(CachedResponse(self.stand_in.base_url + "pokemon-species/missingno", "Not Found"))
+        dirpath = os.path.join(self.directory.name, "recorded")
+
+        with self.assertLogs("pokeapistandin", "INFO"):
+            count = record_fixtures(self.database, dirpath, self.stand_in.base_url)
+
+        assert count == 2
+        assert os.listdir(os.path.join(dirpath, "pokemon-species")) == ["eevee"]
+
+    def test_record_fixtures(self):
+        self.api.get_pokemon_moves("eevee")
+        dirpath = os.path.join(self.directory.name, "recorded")
+
+        count = record_fixtures(self.database, dirpath, self.stand_in.base_url)
+
+        assert count == 2
+        with PokeApiStandIn(dirpath) as recorded:
+            response = requests.get(recorded.base_url + "pokemon/133/").json()
+        assert response["name"] == "eevee"
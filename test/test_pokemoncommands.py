@@ -0,0 +1,78 @@
+import unittest
+
+import commands.pokemon as pokemon_commands
+from commands.pokemon import AddRandomPokemonCommand, EditPokemonMovesetCommand, reroll_movesets
+from exceptions import ApiRequestFailedException
+from test.test_batchgenerator import LocalPokemonWikiApi
+from test.test_pokemonpool import FailingPokemonWikiApi
+from trainer import Trainer
+
+
+class TestAddRandomPokemonCommand(unittest.TestCase):
+    def setUp(self):
+        self.create_api = pokemon_commands.create_pokemon_wiki_api
+        self.trainer = Trainer("trainer")
+
+    def tearDown(self):
+        pokemon_commands.stop_random_pokemon_pool()
+        pokemon_commands._pool = None
+        pokemon_commands.create_pokemon_wiki_api = self.create_api
+
+    def test_start_pool_on_first_add(self):
+        pokemon_commands.create_pokemon_wiki_api = LocalPokemonWikiApi
+        assert pokemon_commands._pool is None
+
+        AddRandomPokemonCommand().execute(self.trainer)
+
+        assert [p["species"] for p in self.trainer.properties["team"]] == ["cobblemon:bulbasaur"]
+        assert pokemon_commands._pool.is_running()
+
+    def test_log_failed_request(self):
+        pokemon_commands.create_pokemon_wiki_api = FailingPokemonWikiApi
+
+        AddRandomPokemonCommand().execute(self.trainer)
+
+        assert self.trainer.properties["team"] == []
+        assert pokemon_commands._pool is None
+
+
+class OfflinePokemonWikiApi(LocalPokemonWikiApi):
+    def prefetch(self, names, levels=None):
+        raise ApiRequestFailedException("API request failed")
+
+
+class TestEditPokemonMovesetCommand(unittest.TestCase):
+    def setUp(self):
+        self.create_api = pokemon_commands.create_pokemon_wiki_api
+        self.trainer = Trainer("trainer")
+        self.trainer.properties["team"].append({"species": "cobblemon:bulbasaur", "level": 10, "moveset": ["tackle"]})
+
+    def tearDown(self):
+        pokemon_commands.create_pokemon_wiki_api = self.create_api
+
+    def test_log_failed_request(self):
+        pokemon_commands.create_pokemon_wiki_api = OfflinePokemonWikiApi
+        command = EditPokemonMovesetCommand(0)
+        command._confirm_randomize_moveset = lambda: True
+
+        command.execute(self.trainer)
+
+        assert self.trainer.properties["team"][0]["moveset"] == ["tackle"]
+
+
+class HalfOfflinePokemonWikiApi(LocalPokemonWikiApi):
+    def get_pokemon_move_details_at_level(self, name, level):
+        if name == "ivysaur":
+            raise ApiRequestFailedException("API request failed")
+        return super().get_pokemon_move_details_at_level(name, level)
+
+
+class TestRerollMovesets(unittest.TestCase):
+    def test_keep_every_moveset_on_failure(self):
+        team = [{"species": "cobblemon:bulbasaur", "level": 10, "moveset": ["tackle"]},
+                {"species": "cobblemon:ivysaur", "level": 10, "moveset": ["tackle"]}]
+
+        with self.assertRaises(ApiRequestFailedException):
+            reroll_movesets(HalfOfflinePokemonWikiApi(), team)
+
+        assert [p["moveset"] for p in team] == [["tackle"], ["tackle"]]
@@ -0,0 +1,56 @@
+import random
+import unittest
+from collections import Counter
+
+from exceptions import PokemonCreationFailedException
+from pokemonfactory import RandomizedPokemonFactory, draw_random_indices, NATURES, MOVESET_SIZE
+from test.test_batchgenerator import LocalPokemonWikiApi
+
+
+class TestRandomizedPokemonFactory(unittest.TestCase):
+    def setUp(self):
+        self.factory = RandomizedPokemonFactory(LocalPokemonWikiApi(), random.Random(0))
+
+    def test_create_many(self):
+        pokemons = self.factory.create_many(["bulbasaur"] * 3)
+
+        assert len(pokemons) == 3
+        for pokemon in pokemons:
+            assert pokemon["species"] == "cobblemon:bulbasaur"
+            assert pokemon["gender"] in ["MALE", "FEMALE"]
+            assert len(set(pokemon["moveset"])) == MOVESET_SIZE
+            assert all(0 <= iv <= 31 for iv in pokemon["ivs"].values())
+
+    def test_create_at_level(self):
+        pokemon = self.factory.create("bulbasaur", 3)
+        pokemons = self.factory.create_many(["bulbasaur", "bulbasaur"], [1, 3])
+
+        assert pokemon["level"] == 3
+        assert sorted(pokemon["moveset"]) == ["growl", "tackle", "vinewhip"]
+        assert sorted(pokemons[0]["moveset"]) == ["growl", "tackle"]
+        assert sorted(pokemons[1]["moveset"]) == ["growl", "tackle", "vinewhip"]
+
+    def test_create_many_with_invalid_name(self):
+        with self.assertRaises(PokemonCreationFailedException):
+            self.factory.create_many(["bulbasaur", ""])
+
+    def test_create_many_matches_create_distribution(self):
+        batch = self.factory.create_many(["bulbasaur"] * 5000)
+        scalar = [self.factory.create("bulbasaur") for _ in range(5000)]
+
+        for pokemons in [batch, scalar]:
+            ivs = [iv for p in pokemons for iv in p["ivs"].values()]
+            assert abs(sum(ivs) / len(ivs) - 15.5) < 0.3
+            natures = Counter(p["nature"] for p in pokemons)
+            assert len(natures) == len(NATURES)
+            assert max(natures.values()) < 2 * min(natures.values())
+            moves = Counter(m for p in pokemons for m in p["moveset"])
+            assert max(moves.values()) < 1.2 * min(moves.values())
+
+    def test_draw_random_indices(self):
+        indices = draw_random_indices([1, 2, 3] * 1000, random.Random(0))
+        assert all(0 <= i < size for i, size in zip(indices, [1, 2, 3] * 1000))
+
+    def test_draw_same_indices_on_any_host(self):
+        # Pinned, so that reading the bytes in the host's byte order would fail on big-endian hosts
+        assert draw_random_indices([6, 10, 100], random.Random(5)) == [1, 3, 69]
@@ -0,0 +1,43 @@
+import random
+import time
+import unittest
+
+from exceptions import ApiRequestFailedException
+from pokemonpool import RandomPokemonPool
+from test.test_batchgenerator import LocalPokemonWikiApi
+
+TIMEOUT = 5
+
+
+class FailingPokemonWikiApi(LocalPokemonWikiApi):
+    def get_random_pokemon_name(self, rng=None):
+        raise ApiRequestFailedException("API request failed")
+
+
+def wait_for_size(pool, size):
+    deadline = time.monotonic() + TIMEOUT
+    while len(pool) < size and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return len(pool)
+
+
+class TestRandomPokemonPool(unittest.TestCase):
+    def test_fill_and_refill(self):
+        pool = RandomPokemonPool(LocalPokemonWikiApi, 2, random.Random(0)).start()
+        try:
+            assert wait_for_size(pool, 2) == 2
+            assert pool.pop()["species"] == "cobblemon:bulbasaur"
+            assert wait_for_size(pool, 2) == 2
+        finally:
+            pool.stop(TIMEOUT)
+        assert not pool.is_running()
+
+    def test_pop_empty(self):
+        pool = RandomPokemonPool(FailingPokemonWikiApi).start()
+        try:
+            assert pool.pop() is None
+        finally:
+            start = time.monotonic()
+            pool.stop(TIMEOUT)
+        assert not pool.is_running()
+        assert time.monotonic() - start < 1
@@ -1,6 +1,6 @@
 import unittest
 
-from pokemonwikiapi import PokeApi
+from pokemonwikiapi import PokeApi, select_eligible_species, get_learnset
 
 
 class TestPokeApi(unittest.TestCase):
@@ -20,3 +20,54 @@ class TestPokeApi(unittest.TestCase):
     def test_get_random_pokemon_name(self):
         name = self.api.get_random_pokemon_name()
         print(name)
+
+
+class TestSelectEligibleSpecies(unittest.TestCase):
+    def setUp(self):
+        self.species_list = {
+            "count": 3,
+            "results": [
+                {"name": "sprigatito", "url": "https://pokeapi.co/api/v2/pokemon-species/906/"},
+                {"name": "bulbasaur", "url": "https://pokeapi.co/api/v2/pokemon-species/1/"},
+                {"name": "ogerpon", "url": "https://pokeapi.co/api/v2/pokemon-species/1017/"},
+            ]
+        }
+        self.generation_ix = {"pokemon_species": [{"name": "sprigatito"}, {"name": "ogerpon"}]}
+
+    def test_exclude_generation(self):
+        eligibility = {"excludedGenerations": ["generation-ix"], "allowlist": [], "denylist": []}
+        eligible = select_eligible_species(self.species_list, [self.generation_ix], eligibility)
+        assert eligible == [(1, "bulbasaur")]
+
+    def test_allowlist_and_denylist(self):
+        eligibility = {"excludedGenerations": ["generation-ix"], "allowlist": ["sprigatito"], "denylist": ["bulbasaur"]}
+        eligible = select_eligible_species(self.species_list, [self.generation_ix], eligibility)
+        assert eligible == [(906, "sprigatito")]
+
+
+def create_move(name, move_id, *details):
+    return {
+        "move": {"name": name, "url": "https://pokeapi.co/api/v2/move/{}/".format(move_id)},
+        "version_group_details": [{
+            "level_learned_at": level,
+            "move_learn_method": {"name": method},
+            "version_group": {"name": version_group, "url": "https://pokeapi.co/api/v2/version-group/{}/".format(i)}
+        } for version_group, i, method, level in details]
+    }
+
+
+class TestGetLearnset(unittest.TestCase):
+    def test_select_version_group(self):
+        moves = [
+            create_move("vine-whip", 22, ("sword-shield", 20, "level-up", 9), ("scarlet-violet", 25, "level-up", 3)),
+            create_move("sludge-bomb", 188, ("scarlet-violet", 25, "machine", 0)),
+            create_move("leech-seed", 73, ("sword-shield", 20, "level-up", 9)),
+        ]
+        assert get_learnset(moves) == [("vinewhip", "level-up", 3, 22), ("sludgebomb", "machine", 0, 188)]
+
+    def test_fall_back_to_latest_version_group(self):
+        moves = [
+            create_move("tackle", 33, ("red-blue", 1, "level-up", 1), ("sword-shield", 20, "level-up", 1)),
+            create_move("leech-seed", 73, ("red-blue", 1, "level-up", 7)),
+        ]
+        assert get_learnset(moves) == [("tackle", "level-up", 1, 33)]
@@ -0,0 +1,44 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from commands.interface import Command
+from commands.profiler import CommandProfiler
+
+
+class SleepCommand(Command):
+    def execute(self, trainer):
+        time.sleep(0.01)
+
+
+class MenuCommand(Command):
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def execute(self, trainer):
+        self._profiler.execute(SleepCommand(), trainer)
+        self._profiler.execute(SleepCommand(), trainer)
+        raise KeyError
+
+
+class TestCommandProfiler(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.profiler = CommandProfiler()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_exclude_submenu_commands(self):
+        with self.assertRaises(KeyError):
+            self.profiler.execute(MenuCommand(self.profiler), None)
+        self.profiler.write_report(self.directory.name)
+
+        with open(os.path.join(self.directory.name, "timings.json")) as file:
+            timings = json.load(file)
+        assert timings["SleepCommand"]["calls"] == 2
+        assert timings["MenuCommand"]["ownSeconds"] < timings["SleepCommand"]["seconds"]
+        assert os.path.isfile(os.path.join(self.directory.name, "MenuCommand.prof"))
+        assert os.path.isfile(os.path.join(self.directory.name, "report.txt"))
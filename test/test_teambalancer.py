@@ -0,0 +1,46 @@
+import random
+import unittest
+
+from exceptions import TeamBalancingFailedException
+from teambalancer import BalancedTeamSelector
+
+
+class TestBalancedTeamSelector(unittest.TestCase):
+    def setUp(self):
+        self.species_types = {
+            "charmander": ["fire"],
+            "vulpix": ["fire"],
+            "squirtle": ["water"],
+            "bulbasaur": ["grass", "poison"],
+            "oddish": ["grass", "poison"],
+            "pikachu": ["electric"],
+            "geodude": ["rock", "ground"],
+            "onix": ["rock", "ground"],
+        }
+
+    def test_select_complementary_types(self):
+        for seed in range(10):
+            names = BalancedTeamSelector(self.species_types, random.Random(seed)).select(3)
+            types = sorted(tuple(self.species_types[n]) for n in names)
+            assert types == [("grass", "poison"), ("rock", "ground"), ("water",)]
+
+    def test_select_around_team(self):
+        names = BalancedTeamSelector(self.species_types, random.Random(0)).select(
+            2, [["fire"], ["water"]], ["charmander", "squirtle"])
+
+        assert len(names) == 2
+        assert "charmander" not in names and "squirtle" not in names
+        assert "bulbasaur" in names or "oddish" in names
+
+    def test_select_same_types_twice_when_needed(self):
+        names = BalancedTeamSelector({"vulpix": ["fire"], "charmander": ["fire"]}).select(2)
+        assert sorted(names) == ["charmander", "vulpix"]
+
+    def test_keep_catalog_names(self):
+        species_types = {"mr-mime": ["psychic", "fairy"], "ho-oh": ["fire", "flying"], "porygon-z": ["normal"]}
+        names = BalancedTeamSelector(species_types, random.Random(0)).select(2, excluded_names=["ho-oh"])
+        assert sorted(names) == ["mr-mime", "porygon-z"]
+
+    def test_not_enough_species(self):
+        with self.assertRaises(TeamBalancingFailedException):
+            BalancedTeamSelector(self.species_types).select(3, excluded_names=list(self.species_types)[:6])
@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+import unittest
+
+from common import TokenBucket
+from exceptions import ApiRequestFailedException
+from pokeapistandin import PokeApiStandIn
+from pokemonwikiapi import PokeApi, Sqlite3, NormalizedSqlite3, ConnectionManager
+from test.test_batchgenerator import LocalPokemonWikiApi
+from trainerengine import TrainerGenerationEngine, CachedOnlyPokeApi, derive_rng
+from trainerwriter import JsonDirectoryTrainerWriter
+
+FIXTURE_DIRPATH = os.path.join(os.path.dirname(__file__), "fixtures", "pokeapi")
+
+
+def read_trainers(dirpath):
+    trainers = {}
+    for filename in sorted(os.listdir(dirpath)):
+        with open(os.path.join(dirpath, filename)) as file:
+            trainers[filename] = json.load(file)
+    return trainers
+
+
+class TestTrainerGenerationEngine(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.trainer_specs = [{"name": "trainer{}".format(i), "teamSize": 6, "level": {"min": 1, "max": 100}}
+                              for i in range(5)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _generate(self, master_seed, dirname):
+        export_dir = os.path.join(self.directory.name, dirname)
+        writer = JsonDirectoryTrainerWriter(export_dir)
+        TrainerGenerationEngine(LocalPokemonWikiApi(), writer, 1, master_seed).run(self.trainer_specs)
+        return read_trainers(export_dir)
+
+    def test_derive_same_stream_from_same_seed(self):
+        assert derive_rng(7, 3, "pokemon").random() == derive_rng(7, 3, "pokemon").random()
+        assert derive_rng(7, 3, "pokemon").random() != derive_rng(7, 4, "pokemon").random()
+
+    def test_reproduce_trainers_from_master_seed(self):
+        first = self._generate(42, "first")
+        second = self._generate(42, "second")
+        other = self._generate(43, "other")
+
+        assert len(first) == len(self.trainer_specs)
+        assert first == second
+        assert first != other
+
+    def test_record_failures(self):
+        writer = JsonDirectoryTrainerWriter(self.directory.name)
+        summary = TrainerGenerationEngine(LocalPokemonWikiApi(), writer).run(
+            [{"name": "red", "team": ["bulbasaur"]}, {"name": "blue", "level": 101}])
+
+        assert [t["name"] for t in summary["generated"]] == ["red"]
+        assert [t["name"] for t in summary["failed"]] == ["blue"]
+        assert os.path.isfile(os.path.join(self.directory.name, "red.json"))
+
+    def test_reject_duplicate_names(self):
+        writer = JsonDirectoryTrainerWriter(self.directory.name)
+        summary = TrainerGenerationEngine(LocalPokemonWikiApi(), writer).run(
+            [{"name": "red", "team": ["bulbasaur"], "level": 5}, {"name": "Red", "team": ["bulbasaur"], "level": 9}])
+
+        assert [t["name"] for t in summary["generated"]] == ["red"]
+        assert [t["name"] for t in summary["failed"]] == ["Red"]
+        with open(os.path.join(self.directory.name, "red.json")) as file:
+            assert json.load(file)["team"][0]["level"] == 5
+
+
+class TestTrainerGenerationEngineWorkers(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.stand_in = PokeApiStandIn(FIXTURE_DIRPATH).start()
+        self.filepaths = []
+        self.trainer_specs = [
+            {"name": "gym", "team": ["mr-mime", "pikachu", "eevee"], "level": 20},
+            {"name": "missing", "team": ["missingno"], "level": 5},
+        ] + [{"name": "route{}".format(i), "teamSize": 3, "level": {"min": 1, "max": 50}} for i in range(4)]
+        PokeApi._memo.clear()
+
+    def tearDown(self):
+        self.stand_in.stop()
+        for filepath in self.filepaths:
+            ConnectionManager.get(filepath).close()
+        self.directory.cleanup()
+
+    def _generate(self, workers):
+        filepath = os.path.join(self.directory.name, "workers{}.db".format(workers))
+        self.filepaths.append(filepath)
+        api = PokeApi(self.stand_in.base_url, Sqlite3("pokeapi", filepath), NormalizedSqlite3(filepath),
+                      TokenBucket(1000, 1000))
+        export_dir = os.path.join(self.directory.name, "workers{}".format(workers))
+        summary = TrainerGenerationEngine(api, JsonDirectoryTrainerWriter(export_dir), workers, 7, filepath).run(
+            self.trainer_specs)
+        return read_trainers(export_dir), summary["failed"]
+
+    def test_same_trainers_for_any_number_of_workers(self):
+        trainers, failed = self._generate(1)
+        in_workers, failed_in_workers = self._generate(2)
+
+        assert len(trainers) == len(self.trainer_specs) - 1
+        assert in_workers == trainers
+        assert failed_in_workers == failed
+
+    def test_fail_on_uncached_document(self):
+        filepath = os.path.join(self.directory.name, "empty.db")
+        self.filepaths.append(filepath)
+        NormalizedSqlite3(filepath)
+        Sqlite3("pokeapi", filepath)
+        ConnectionManager.get(filepath).flush()
+        requests_before = self.stand_in.request_count
+
+        api = CachedOnlyPokeApi(self.stand_in.base_url, Sqlite3("pokeapi", filepath), NormalizedSqlite3(filepath))
+        with self.assertRaises(ApiRequestFailedException):
+            api.get_pokemon_abilities("pikachu")
+        assert self.stand_in.request_count == requests_before
+
+    def test_prefetch_moves_up_to_highest_level(self):
+        self.trainer_specs = [{"name": "youngster", "team": ["pikachu"], "level": {"min": 1, "max": 4}}]
+
+        trainers, _ = self._generate(1)
+
+        # Species, pokemon and the four moves Pikachu learns up to level 4
+        assert self.stand_in.request_count == 2 + 4
+        assert set(trainers["youngster.json"]["team"][0]["moveset"]) <= \
+               {"quickattack", "tailwhip", "thundershock", "thunderwave"}
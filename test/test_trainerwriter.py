@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+
+from trainer import Trainer
+from trainerwriter import JsonDirectoryTrainerWriter, JsonlTrainerWriter, ZipTrainerWriter
+
+
+class TestTrainerWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.trainers = []
+        for i in range(3):
+            trainer = Trainer("trainer{}".format(i))
+            trainer.properties["team"] = [{"species": "pikachu", "level": i + 1}]
+            self.trainers.append(trainer)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write_json_directory(self):
+        with JsonDirectoryTrainerWriter(self.directory.name) as writer:
+            filepaths = [writer.write(t) for t in self.trainers]
+
+        for trainer, filepath in zip(self.trainers, filepaths):
+            with open(filepath) as file:
+                assert json.load(file) == trainer.properties
+
+    def test_write_jsonl(self):
+        filepath = os.path.join(self.directory.name, "trainers.jsonl")
+        with JsonlTrainerWriter(filepath) as writer:
+            for trainer in self.trainers:
+                writer.write(trainer)
+
+        with open(filepath) as file:
+            lines = [json.loads(line) for line in file]
+        assert lines == [{"name": t.name, "properties": t.properties} for t in self.trainers]
+
+    def test_write_zip_same_as_export(self):
+        filepath = os.path.join(self.directory.name, "trainers.zip")
+        with ZipTrainerWriter(filepath) as writer:
+            for trainer in self.trainers:
+                writer.write(trainer)
+
+        with zipfile.ZipFile(filepath) as archive:
+            assert archive.namelist() == ["trainers/{}.json".format(t.name) for t in self.trainers]
+            for trainer in self.trainers:
+                assert json.loads(archive.read("trainers/{}.json".format(trainer.name))) == trainer.properties
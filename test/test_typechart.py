@@ -0,0 +1,26 @@
+import unittest
+
+from typechart import EFFECTIVENESS, TYPE_NAMES, get_multiplier, get_weakness_vector, get_coverage_mask
+
+
+class TestTypeChart(unittest.TestCase):
+    def test_matrix_shape(self):
+        assert len(EFFECTIVENESS) == len(TYPE_NAMES)
+        assert all(len(row) == len(TYPE_NAMES) for row in EFFECTIVENESS)
+
+    def test_get_multiplier(self):
+        assert get_multiplier("ground", ["fire", "flying"]) == 0
+        assert get_multiplier("ice", ["grass", "ground"]) == 4
+        assert get_multiplier("fire", ["water", "grass"]) == 1
+        assert get_multiplier("normal", ["shadow"]) == 1
+
+    def test_get_weakness_vector(self):
+        weakness = dict(zip(TYPE_NAMES, get_weakness_vector(["grass", "poison"])))
+        assert weakness["fire"] == 1
+        assert weakness["grass"] == -2
+        assert weakness["normal"] == 0
+
+    def test_get_coverage_mask(self):
+        mask = get_coverage_mask(["electric", "steel"])
+        covered = [t for i, t in enumerate(TYPE_NAMES) if mask >> i & 1]
+        assert covered == ["flying", "rock", "water", "ice", "fairy"]
@@ -0,0 +1,156 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from batchgenerator import BatchTrainerGenerator
+from common import create_double_logger
+from exceptions import InvalidTrainerSpecException, PokemonCreationFailedException, ApiRequestFailedException
+from pokemonwikiapi import PokeApi, Sqlite3, NormalizedSqlite3, ConnectionManager
+from trainer import Trainer
+
+CHUNK_SIZE = 8
+
+_worker_generator = None
+
+
+def derive_rng(master_seed, index, purpose):
+    '''
+    String seeds are hashed with SHA-512, so every process derives the same stream regardless of PYTHONHASHSEED
+    '''
+    return random.Random("{seed}:{index}:{purpose}".format(seed=master_seed, index=index, purpose=purpose))
+
+
+def generate_trainer(generator, job):
+    '''
+    What the serial path and the workers run for every trainer, TrainerGenerationEngine records the result
+    :return: {"name", "properties", "seconds"} of the generated trainer or {"name", "reason"} it failed for
+    '''
+    index, trainer_spec, master_seed = job
+    name = trainer_spec.get("name", "")
+    start = time.perf_counter()
+    try:
+        trainer = generator.generate(trainer_spec, derive_rng(master_seed, index, "pokemon"))
+        return {"name": name, "properties": trainer.properties, "seconds": time.perf_counter() - start}
+    except (InvalidTrainerSpecException, PokemonCreationFailedException, ApiRequestFailedException) as e:
+        return {"name": name, "reason": e.message}
+
+
+class CachedOnlyPokeApi(PokeApi):
+    '''
+    What workers read, every document has to be in the catalog the parent process prefetched into
+    Anything missing fails the trainer instead: requesting it would take a rate limiter of the worker's own,
+    so N workers would send N requests per second, and saving it would be dropped by the read-only connection
+    '''
+
+    def _get_response(self, url):
+        raise ApiRequestFailedException("{url} was not cached before generating".format(url=url))
+
+    def _fetch_and_save_to_database(self, urls):
+        self._logger.debug("{count} documents were not cached before generating".format(count=len(urls)))
+        return set(urls)
+
+
+def _initialize_worker(filepath):
+    global _worker_generator
+    ConnectionManager.open_read_only(filepath)
+    api = CachedOnlyPokeApi(database=Sqlite3("pokeapi", filepath), catalog=NormalizedSqlite3(filepath))
+    # Trainers are handed back to the parent process, which is the only one writing them
+    _worker_generator = BatchTrainerGenerator(api)
+
+
+def _generate_trainer_in_worker(job):
+    return generate_trainer(_worker_generator, job)
+
+
+class TrainerGenerationEngine:
+    '''
+    Generates trainers across a process pool, every trainer draws from its own seed derived from the master seed
+    so the output only depends on the master seed, the spec and the cache, not on the number of workers
+
+    Random teams are picked and every document is prefetched in this process first,
+    workers then open the cache read-only and never go through the rate limiter, see CachedOnlyPokeApi
+    '''
+
+    def __init__(self, api, writer, workers=1, master_seed=0, cache_filepath=Sqlite3.DB_NAME):
+        '''
+        :param cache_filepath: cache api prefetches into, which workers read
+        '''
+        self._logger = create_double_logger(__name__)
+        self._api = api
+        self._writer = writer
+        self._generator = BatchTrainerGenerator(api)
+        self._workers = workers
+        self._master_seed = master_seed
+        self._cache_filepath = cache_filepath
+
+    def run(self, trainer_specs):
+        summary = {"seed": self._master_seed, "generated": [], "failed": [], "seconds": 0}
+        start = time.perf_counter()
+
+        jobs = []
+        names = set()
+        for index, trainer_spec in enumerate(trainer_specs):
+            # Trainers are written under their name, a second one would overwrite the first
+            name = str(trainer_spec.get("name", "")).casefold()
+            if name != "" and name in names:
+                self._record(summary, {"name": trainer_spec["name"], "reason": "Trainer name is used more than once"})
+                continue
+            names.add(name)
+            jobs.append((index, self._resolve_team(index, trainer_spec), self._master_seed))
+        self._prefetch(jobs)
+
+        for result in self._generate_all(jobs):
+            self._record(summary, result)
+
+        summary["seconds"] = time.perf_counter() - start
+        self._logger.info("Generated {generated} trainers, {failed} failed in {seconds:.2f} seconds".format(
+            generated=len(summary["generated"]), failed=len(summary["failed"]), seconds=summary["seconds"]))
+        return summary
+
+    def _resolve_team(self, index, trainer_spec):
+        try:
+            names = self._generator.get_team_names(trainer_spec, derive_rng(self._master_seed, index, "team"))
+            return {**trainer_spec, "team": names}
+        except InvalidTrainerSpecException:
+            # Left as is, generating it reports the same error
+            return trainer_spec
+
+    def _prefetch(self, jobs):
+        '''
+        Moves are fetched up to the highest level of each trainer, so their movesets are scored like interactive ones
+        '''
+        names = []
+        levels = []
+        for _, trainer_spec, _ in jobs:
+            try:
+                level = self._generator.get_maximum_level(trainer_spec)
+            except InvalidTrainerSpecException:
+                continue
+            team = trainer_spec.get("team", [])
+            names.extend(team)
+            levels.extend([level] * len(team))
+        self._api.prefetch(names, levels)
+
+    def _generate_all(self, jobs):
+        if self._workers <= 1:
+            for job in jobs:
+                yield generate_trainer(self._generator, job)
+            return
+
+        # Workers only see what this process has committed
+        ConnectionManager.get(self._cache_filepath).flush()
+        with ProcessPoolExecutor(max_workers=self._workers, initializer=_initialize_worker,
+                                 initargs=(self._cache_filepath,)) as executor:
+            yield from executor.map(_generate_trainer_in_worker, jobs, chunksize=CHUNK_SIZE)
+
+    def _record(self, summary, result):
+        if "reason" in result:
+            summary["failed"].append({"name": result["name"], "reason": result["reason"]})
+            self._logger.info("Failed to generate {trainer}: {reason}".format(trainer=result["name"],
+                                                                               reason=result["reason"]))
+            return
+
+        trainer = Trainer(result["name"])
+        trainer.properties = result["properties"]
+        filepath = self._writer.write(trainer)
+        summary["generated"].append({"name": result["name"], "filepath": filepath, "seconds": result["seconds"]})
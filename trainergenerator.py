@@ -2,7 +2,10 @@ import logging
 
 import inquirer
 
-from commands.misc import PrintTrainerCommand, CloseCommandPromptCommand, ExportTrainerCommand, ImportTrainerCommand
+from commands.cache import EditCacheCommand
+from commands.interface import execute_command
+from commands.misc import PrintTrainerCommand, CloseCommandPromptCommand, ExportTrainerCommand, ImportTrainerCommand, \
+    PrintStatsCommand
 from commands.pokemon import EditTeamCommand
 from commands.trainer import EditTrainerCommand
 from exceptions import CommandPromptCloseException
@@ -23,9 +26,11 @@ class TrainerGenerator:
                     ("Pokemon", EditTeamCommand()),
                     ("Export", ExportTrainerCommand()),
                     ("Import", ImportTrainerCommand()),
+                    ("Cache", EditCacheCommand()),
+                    ("Stats", PrintStatsCommand()),
                     ("Close", CloseCommandPromptCommand())
                 ]
                 answer = inquirer.prompt([inquirer.List("command", "Select command", COMMANDS)])
-                answer["command"].execute(self._trainer)
+                execute_command(answer["command"], self._trainer)
             except CommandPromptCloseException:
                 return
@@ -0,0 +1,92 @@
+import json
+import os
+import zipfile
+from abc import ABC, abstractmethod
+
+COMPACT_SEPARATORS = (",", ":")
+ARCHIVE_TRAINER_DIR = "trainers"
+
+
+class TrainerWriter(ABC):
+    '''
+    Writes trainers one at a time as they are generated, so a batch never has to be held in memory
+    '''
+
+    @abstractmethod
+    def write(self, trainer):
+        """
+        :return: where the trainer was written to
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class JsonDirectoryTrainerWriter(TrainerWriter):
+    '''
+    One pretty-printed file per trainer, the same as Export
+    '''
+
+    def __init__(self, dirpath):
+        self._dirpath = dirpath
+        os.makedirs(dirpath, exist_ok=True)
+
+    def write(self, trainer):
+        filepath = os.path.join(self._dirpath, trainer.name + ".json")
+
+        with open(filepath, "w") as file:
+            json.dump(trainer.properties, file, indent=2)
+
+        return filepath
+
+
+class JsonlTrainerWriter(TrainerWriter):
+    '''
+    Every trainer is a single line of {"name": ..., "properties": ...} in one file
+    '''
+
+    def __init__(self, filepath):
+        self._filepath = filepath
+        self._file = open(filepath, "w")
+
+    def write(self, trainer):
+        line = json.dumps({"name": trainer.name, "properties": trainer.properties}, separators=COMPACT_SEPARATORS)
+        self._file.write(line + "\n")
+        return self._filepath
+
+    def close(self):
+        self._file.close()
+
+
+class ZipTrainerWriter(TrainerWriter):
+    '''
+    Every trainer is a file in the trainers directory of the archive, named as Export names it
+    Extracting the archive gives the same files as exporting the trainers one by one
+    '''
+
+    def __init__(self, filepath):
+        self._filepath = filepath
+        self._archive = zipfile.ZipFile(filepath, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, trainer):
+        arcname = "{dir}/{name}.json".format(dir=ARCHIVE_TRAINER_DIR, name=trainer.name)
+        self._archive.writestr(arcname, json.dumps(trainer.properties, separators=COMPACT_SEPARATORS))
+        return "{filepath}:{arcname}".format(filepath=self._filepath, arcname=arcname)
+
+    def close(self):
+        self._archive.close()
+
+
+def create_trainer_writer(output_format, path):
+    if output_format == "jsonl":
+        return JsonlTrainerWriter(path)
+    if output_format == "zip":
+        return ZipTrainerWriter(path)
+    return JsonDirectoryTrainerWriter(path)
@@ -0,0 +1,61 @@
+TYPE_NAMES = [
+    "normal", "fighting", "flying", "poison", "ground", "rock", "bug", "ghost", "steel",
+    "fire", "water", "grass", "electric", "psychic", "ice", "dragon", "dark", "fairy"
+]
+TYPE_INDICES = {t: i for i, t in enumerate(TYPE_NAMES)}
+
+# Rows attack and columns defend, both in TYPE_NAMES order, as of generation VI
+EFFECTIVENESS = [
+    # Nor Fig Fly Poi Gro Roc Bug Gho Ste Fir Wat Gra Ele Psy Ice Dra Dar Fai
+    [  1,   1,   1,   1,   1,  .5,   1,   0,  .5,   1,   1,   1,   1,   1,   1,   1,   1,   1],  # normal
+    [  2,   1,  .5,  .5,   1,   2,  .5,   0,   2,   1,   1,   1,   1,  .5,   2,   1,   2,  .5],  # fighting
+    [  1,   2,   1,   1,   1,  .5,   2,   1,  .5,   1,   1,   2,  .5,   1,   1,   1,   1,   1],  # flying
+    [  1,   1,   1,  .5,  .5,  .5,   1,  .5,   0,   1,   1,   2,   1,   1,   1,   1,   1,   2],  # poison
+    [  1,   1,   0,   2,   1,   2,  .5,   1,   2,   2,   1,  .5,   2,   1,   1,   1,   1,   1],  # ground
+    [  1,  .5,   2,   1,  .5,   1,   2,   1,  .5,   2,   1,   1,   1,   1,   2,   1,   1,   1],  # rock
+    [  1,  .5,  .5,  .5,   1,   1,   1,  .5,  .5,  .5,   1,   2,   1,   2,   1,   1,   2,  .5],  # bug
+    [  0,   1,   1,   1,   1,   1,   1,   2,   1,   1,   1,   1,   1,   2,   1,   1,  .5,   1],  # ghost
+    [  1,   1,   1,   1,   1,   2,   1,   1,  .5,  .5,  .5,   1,  .5,   1,   2,   1,   1,   2],  # steel
+    [  1,   1,   1,   1,   1,  .5,   2,   1,   2,  .5,  .5,   2,   1,   1,   2,  .5,   1,   1],  # fire
+    [  1,   1,   1,   1,   2,   2,   1,   1,   1,   2,  .5,  .5,   1,   1,   1,  .5,   1,   1],  # water
+    [  1,   1,  .5,  .5,   2,   2,  .5,   1,  .5,  .5,   2,  .5,   1,   1,   1,  .5,   1,   1],  # grass
+    [  1,   1,   2,   1,   0,   1,   1,   1,   1,   1,   2,  .5,  .5,   1,   1,  .5,   1,   1],  # electric
+    [  1,   2,   1,   2,   1,   1,   1,   1,  .5,   1,   1,   1,   1,  .5,   1,   1,   0,   1],  # psychic
+    [  1,   1,   2,   1,   2,   1,   1,   1,  .5,  .5,  .5,   2,   1,   1,  .5,   2,   1,   1],  # ice
+    [  1,   1,   1,   1,   1,   1,   1,   1,  .5,   1,   1,   1,   1,   1,   1,   2,   1,   0],  # dragon
+    [  1,  .5,   1,   1,   1,   1,   1,   2,   1,   1,   1,   1,   1,   2,   1,   1,  .5,  .5],  # dark
+    [  1,   2,   1,  .5,   1,   1,   1,   1,  .5,  .5,   1,   1,   1,   1,   1,   2,   2,   1],  # fairy
+]
+
+# Weakness of a defender to an attacking type, from immune to four times weak
+WEAKNESS_LEVELS = {0: -2, 0.25: -2, 0.5: -1, 1: 0, 2: 1, 4: 2}
+
+
+def get_multiplier(attacking_type, defending_types):
+    multiplier = 1
+    for defending_type in defending_types:
+        if defending_type in TYPE_INDICES:
+            multiplier *= EFFECTIVENESS[TYPE_INDICES[attacking_type]][TYPE_INDICES[defending_type]]
+    return multiplier
+
+
+def get_weakness_vector(types):
+    '''
+    Types PokeAPI has but the chart does not, like shadow, are ignored
+    :return: weakness level to every attacking type in TYPE_NAMES order
+    '''
+    return [WEAKNESS_LEVELS[get_multiplier(t, types)] for t in TYPE_NAMES]
+
+
+def get_coverage_mask(types):
+    '''
+    :return: bit i is set when one of types is super effective against TYPE_NAMES[i]
+    '''
+    mask = 0
+    for attacking_type in types:
+        if attacking_type not in TYPE_INDICES:
+            continue
+        for i, multiplier in enumerate(EFFECTIVENESS[TYPE_INDICES[attacking_type]]):
+            if multiplier > 1:
+                mask |= 1 << i
+    return mask